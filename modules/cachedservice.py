@@ -0,0 +1,336 @@
+"""Module for the CachedService class, the base of the upstream services."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+import aiohttp
+import toml
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from modules.server import Server
+    from modules.settings import Settings
+
+
+class ServiceStatsResponse(BaseModel):
+    """ServiceStatsResponse class, used to represent the stats of a service."""
+
+    name: str
+    hits: int
+    misses: int
+    errors: int
+    mean_latency: float
+    max_latency: float
+    cached_keys: int
+
+
+class TTLCache:
+    """TTLCache class, a keyed cache whose entries expire after a time.
+
+    Expired entries are kept, so that they can be served while the upstream
+    is unreachable, until the cache is full: then the expired entries are
+    dropped first, followed by the least recently used ones.
+    """
+
+    _max_size: int
+    _entries: OrderedDict[Any, tuple[float, Any]]
+
+    def __init__(self, max_size: int = 64) -> TTLCache:
+        """Create a TTLCache object.
+
+        Args:
+            max_size (int, optional): maximum number of entries.
+                Defaults to 64.
+
+        Returns:
+            TTLCache
+        """
+        self._max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key: Any, stale: bool = False) -> Any | None:
+        """Get a cached value.
+
+        Args:
+            key (Any): the key of the value
+            stale (bool, optional): whether to return the value even if it
+                has expired. Defaults to False.
+
+        Returns:
+            Any | None: the value, None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expire_time, value = entry
+        if not stale and time.monotonic() > expire_time:
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any, ttl: float) -> None:
+        """Cache a value.
+
+        Args:
+            key (Any): the key of the value
+            value (Any): the value
+            ttl (float): time after which the value expires, in seconds
+        """
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, value)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self._max_size:
+            expired = [k for k, (e, _) in self._entries.items() if e < now]
+            for k in expired[: len(self._entries) - self._max_size]:
+                del self._entries[k]
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        return len(self._entries)
+
+
+class CachedService:
+    """CachedService class, the base of the services caching an upstream api.
+
+    It provides:
+        - the loading of the settings, from the section of the settings file
+            named after the class
+        - a keyed TTL cache, serving stale values when the upstream fails
+        - a HTTP client session shared by all the services
+        - the scheduling of a periodic refresh on the server
+        - hit, miss, error and latency stats
+
+    This class is not meant to be instantiated; it is meant to be inherited from.
+    """
+
+    # settings class of the service, set by the subclasses
+    _settings_class: type[Settings]
+    # delay before requesting a failed key again, in seconds
+    _RETRY_DELAY = 60
+    # client session shared by all the services
+    _session: aiohttp.ClientSession | None = None
+
+    _settings_path: str
+    _overrides: dict
+    _settings: Settings
+    _cache: TTLCache
+    _failed_time: dict[Any, float]
+    _pending: dict[Any, asyncio.Future]
+
+    _hits: int
+    _misses: int
+    _errors: int
+    _total_latency: float
+    _max_latency: float
+
+    def __init__(
+        self,
+        settings_path: str = "settings/settings.toml",
+        overrides: dict | None = None,
+        cache_size: int = 64,
+    ) -> CachedService:
+        """Initialize the service.
+
+        Args:
+            settings_path (str, optional): Path to the settings file.
+                Defaults to "settings/settings.toml".
+            overrides (dict, optional): Settings overriding the ones in the
+                settings file. Defaults to None.
+            cache_size (int, optional): Maximum number of cached keys.
+                Defaults to 64.
+        """
+        logging.info(f"Initializing {self.__class__.__name__}")
+        self._settings_path = settings_path
+        self._overrides = overrides or {}
+        self._cache = TTLCache(cache_size)
+        self._failed_time = {}
+        self._pending = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._total_latency = 0
+        self._max_latency = 0
+
+        self._loadSettings()
+
+    def _loadSettings(self) -> None:
+        """Load the settings from the settings file.
+
+        A missing section is allowed if the settings have defaults.
+        """
+        with open(self._settings_path, "r") as f:
+            settings = toml.load(f).get(self.__class__.__name__, {})
+
+        self._settings = self._settings_class.fromDict({**settings, **self._overrides})
+
+    @classmethod
+    def _getSession(cls) -> aiohttp.ClientSession:
+        """Get the shared client session, creating it if needed.
+
+        Returns:
+            aiohttp.ClientSession
+        """
+        if CachedService._session is None or CachedService._session.closed:
+            CachedService._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(ttl_dns_cache=300),
+            )
+
+        return CachedService._session
+
+    @classmethod
+    async def closeSession(cls) -> None:
+        """Close the shared client session."""
+        if CachedService._session is not None and not CachedService._session.closed:
+            logging.info("Closing services session")
+            await CachedService._session.close()
+
+    async def _requestJSON(self, url: str, headers: dict = None) -> Any:
+        """Request a JSON object from a url.
+
+        Args:
+            url (str): the url
+            headers (dict, optional): the headers of the request.
+                Defaults to None.
+
+        Returns:
+            Any: the JSON object
+        """
+        async with self._getSession().get(url, headers=headers) as response:
+            if response.status != 200:
+                logging.error(
+                    f"Request to {url} returned status code {response.status}"
+                )
+                raise Exception(
+                    f"Request to {url} returned status code {response.status}"
+                )
+
+            return await response.json()
+
+    async def _fetch(
+        self, key: Any, ttl: float, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Fetch a value from the upstream and cache it.
+
+        Args:
+            key (Any): the key of the value
+            ttl (float): time after which the value expires, in seconds
+            fetch (Callable[[], Awaitable[Any]]): function fetching the value
+
+        Returns:
+            Any: the value
+        """
+        self._misses += 1
+        started_time = time.monotonic()
+        try:
+            value = await fetch()
+        except Exception:
+            self._errors += 1
+            self._failed_time[key] = time.monotonic()
+            raise
+        finally:
+            latency = time.monotonic() - started_time
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+        logging.info(f"{self.__class__.__name__} fetched {key} in {latency} seconds")
+        self._failed_time.pop(key, None)
+        self._cache.set(key, value, ttl)
+        return value
+
+    async def _getCached(
+        self,
+        key: Any,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+        force: bool = False,
+    ) -> Any:
+        """Get a value from the cache, fetching it if it has expired.
+
+        Concurrent misses of the same key share a single fetch.
+        If the fetch fails, the expired value is returned, if any; a failed
+        key is not fetched again before the retry delay.
+
+        Args:
+            key (Any): the key of the value
+            ttl (float): time after which the value expires, in seconds
+            fetch (Callable[[], Awaitable[Any]]): function fetching the value
+            force (bool, optional): whether to fetch the value even if it
+                has not expired. Defaults to False.
+
+        Returns:
+            Any: the value
+        """
+        value = None if force else self._cache.get(key)
+        if value is not None:
+            self._hits += 1
+            return value
+
+        failed_time = self._failed_time.get(key)
+        if failed_time is not None:
+            if time.monotonic() - failed_time < self._RETRY_DELAY:
+                stale = self._cache.get(key, stale=True)
+                if stale is None:
+                    raise Exception(f"{key} unavailable, retrying later")
+                self._hits += 1
+                return stale
+
+        if key not in self._pending:
+            self._pending[key] = asyncio.ensure_future(self._fetch(key, ttl, fetch))
+            self._pending[key].add_done_callback(lambda _: self._pending.pop(key))
+
+        try:
+            return await asyncio.shield(self._pending[key])
+        except Exception as e:
+            stale = self._cache.get(key, stale=True)
+            if stale is None:
+                raise
+            logging.warning(f"Serving stale {key}: {e!r}")
+            return stale
+
+    async def refresh(self) -> None:
+        """Refresh the cached values.
+
+        Meant to be overridden by the subclasses.
+        """
+
+    @property
+    def refresh_interval(self) -> int:
+        """Get the interval between the background refreshes, 0 if disabled."""
+        return self._settings.refresh_interval
+
+    def scheduleRefresh(self, server: Server, interval: float) -> None:
+        """Schedule a periodic refresh of the cached values.
+
+        Args:
+            server (Server): the server whose scheduler runs the refresh
+            interval (float): the interval between the refreshes, in seconds
+        """
+        server.addScheduleInterval(interval, self.refresh)
+
+    def getStats(self) -> ServiceStatsResponse:
+        """Get the stats of the service.
+
+        Returns:
+            ServiceStatsResponse
+        """
+        return ServiceStatsResponse(
+            name=self.__class__.__name__,
+            hits=self._hits,
+            misses=self._misses,
+            errors=self._errors,
+            mean_latency=self._total_latency / self._misses if self._misses else 0,
+            max_latency=self._max_latency,
+            cached_keys=len(self._cache),
+        )
@@ -0,0 +1,234 @@
+"""Module for the CompressionMiddleware class, used to compress the responses."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Callable
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressionCache:
+    """CompressionCache class, used to store the compressed response bodies.
+
+    Each distinct body is compressed once per encoding; the result is kept in
+    a bounded LRU cache keyed by the digest of the body.
+    """
+
+    _max_size: int
+    _cache: OrderedDict[tuple[bytes, str], bytes]
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 64) -> CompressionCache:
+        """Create a CompressionCache object.
+
+        Args:
+            max_size (int, optional): maximum number of cached bodies.
+                Defaults to 64.
+
+        Returns:
+            CompressionCache
+        """
+        self._max_size = max_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _compress(body: bytes, encoding: str) -> bytes:
+        """Compress a body.
+
+        Args:
+            body (bytes): the body to compress
+            encoding (str): the encoding, either "br" or "gzip"
+
+        Returns:
+            bytes
+        """
+        # moderate levels: the bodies are compressed on the event loop,
+        # and the highest levels cost several times more for a few bytes
+        if encoding == "br":
+            return brotli.compress(body, mode=brotli.MODE_TEXT, quality=5)
+
+        return gzip.compress(body, compresslevel=6, mtime=0)
+
+    def get(self, body: bytes, encoding: str) -> bytes:
+        """Get the compressed body, compressing it if needed.
+
+        Args:
+            body (bytes): the body to compress
+            encoding (str): the encoding, either "br" or "gzip"
+
+        Returns:
+            bytes
+        """
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return compressed
+
+        self.misses += 1
+        compressed = self._compress(body, encoding)
+        self._cache[key] = compressed
+        if len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+
+        return compressed
+
+
+class CompressionMiddleware:
+    """CompressionMiddleware class, an ASGI middleware compressing responses.
+
+    Only HTML and JSON responses are compressed; the static files and the
+    responses that are already encoded are passed through untouched.
+    """
+
+    _COMPRESSIBLE_TYPES = (b"text/html", b"application/json")
+
+    def __init__(
+        self,
+        app: Callable,
+        min_size: int = 512,
+        cache_size: int = 64,
+    ) -> CompressionMiddleware:
+        """Create a CompressionMiddleware object.
+
+        Args:
+            app (Callable): the ASGI app to wrap
+            min_size (int, optional): minimum size of the body to compress,
+                in bytes. Defaults to 512.
+            cache_size (int, optional): maximum number of cached bodies.
+                Defaults to 64.
+
+        Returns:
+            CompressionMiddleware
+        """
+        self._app = app
+        self._min_size = min_size
+        self._cache = CompressionCache(cache_size)
+        self._encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def _selectEncoding(self, accept_encoding: str) -> str | None:
+        """Select the encoding to use according to the Accept-Encoding header.
+
+        Args:
+            accept_encoding (str): the Accept-Encoding header
+
+        Returns:
+            str | None: the encoding, None if no encoding is accepted
+        """
+        accepted = set()
+        refused = set()
+        for item in accept_encoding.split(","):
+            encoding, _, params = item.strip().partition(";")
+            encoding = encoding.strip().lower()
+            params = params.replace(" ", "").lower()
+            if params in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                refused.add(encoding)
+            else:
+                accepted.add(encoding)
+
+        for encoding in self._encodings:
+            if encoding in accepted:
+                return encoding
+        # the wildcard does not override an explicit refusal
+        if "*" in accepted:
+            for encoding in self._encodings:
+                if encoding not in refused:
+                    return encoding
+
+        return None
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """Handle an ASGI call.
+
+        Args:
+            scope (dict): the ASGI scope
+            receive (Callable): the ASGI receive channel
+            send (Callable): the ASGI send channel
+        """
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self._app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = self._selectEncoding(
+            headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        if encoding is None:
+            await self._app(scope, receive, send)
+            return
+
+        start_message = None
+        body = []
+
+        async def sendCompressed(message: dict) -> None:
+            nonlocal start_message
+
+            if start_message is None:
+                # first message, decide whether to compress the response
+                response_headers = dict(message["headers"])
+                content_type = response_headers.get(b"content-type", b"")
+                if (
+                    b"content-encoding" in response_headers
+                    or not content_type.startswith(self._COMPRESSIBLE_TYPES)
+                ):
+                    start_message = False
+                else:
+                    start_message = message
+                    return
+
+            if start_message is False:
+                await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            await self._sendBody(start_message, b"".join(body), encoding, send)
+
+        await self._app(scope, receive, sendCompressed)
+
+    async def _sendBody(
+        self,
+        start_message: dict,
+        body: bytes,
+        encoding: str,
+        send: Callable,
+    ) -> None:
+        """Send a buffered response, compressing it if worth it.
+
+        Args:
+            start_message (dict): the http.response.start message
+            body (bytes): the full response body
+            encoding (str): the encoding to use
+            send (Callable): the ASGI send channel
+        """
+        headers = [
+            (k, v) for k, v in start_message["headers"] if k != b"content-length"
+        ]
+        headers.append((b"vary", b"Accept-Encoding"))
+
+        if len(body) >= self._min_size:
+            body = self._cache.get(body, encoding)
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    @property
+    def cache(self) -> CompressionCache:
+        """Get the cache of the compressed bodies."""
+        return self._cache
+
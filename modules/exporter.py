@@ -0,0 +1,118 @@
+"""Module for the Exporter class, used to write the homepage as static files."""
+
+from __future__ import annotations
+
+import logging
+import os
+from hashlib import blake2b
+
+
+class Exporter:
+    """Exporter class, used to write static files into an output directory.
+
+    Each file is written to a temporary file and renamed over the old one,
+    so a web server reading the directory never serves a partial file.
+    A file is only written when its content has changed since the last
+    export, so its modification time (and the ETag of the web server)
+    only changes with the content.
+    """
+
+    _output_dir: str
+    _digests: dict[str, bytes]
+    _copied: dict[tuple[str, str], tuple[int, int]]
+
+    def __init__(self, output_dir: str) -> Exporter:
+        """Create an Exporter object.
+
+        Args:
+            output_dir (str): the directory the files are written into
+
+        Returns:
+            Exporter
+        """
+        logging.info(f"Initializing Exporter in {output_dir}")
+        self._output_dir = output_dir
+        # digest of the content of each written file
+        self._digests = {}
+        # size and modification time of each copied file, by source and copy
+        self._copied = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _replace(self, path: str, data: bytes) -> None:
+        """Write a file atomically, through a temporary file.
+
+        Args:
+            path (str): the path of the file
+            data (bytes): the content of the file
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, path)
+
+    def write(self, relative_path: str, data: bytes) -> bool:
+        """Write a file, if its content has changed.
+
+        Args:
+            relative_path (str): the path of the file, relative to
+                the output directory
+            data (bytes): the content of the file
+
+        Returns:
+            bool: whether the file has been written
+        """
+        path = os.path.join(self._output_dir, relative_path)
+        digest = blake2b(data, digest_size=16).digest()
+        if self._digests.get(path) == digest and os.path.exists(path):
+            return False
+
+        logging.info(f"Exporting {relative_path}")
+        self._replace(path, data)
+        self._digests[path] = digest
+        return True
+
+    def copy(self, source_path: str, relative_path: str) -> bool:
+        """Copy a file, if it has changed since the last copy.
+
+        Args:
+            source_path (str): the path of the file to copy
+            relative_path (str): the path of the copy, relative to
+                the output directory
+
+        Returns:
+            bool: whether the file has been copied
+        """
+        stat = os.stat(source_path)
+        version = (stat.st_size, stat.st_mtime_ns)
+        # the same file can be copied to several places
+        key = (source_path, relative_path)
+        if self._copied.get(key) == version:
+            return False
+
+        with open(source_path, "rb") as f:
+            written = self.write(relative_path, f.read())
+        self._copied[key] = version
+        return written
+
+    def copyTree(self, source_dir: str, relative_dir: str) -> int:
+        """Copy the files of a directory that have changed since the last copy.
+
+        Args:
+            source_dir (str): the directory to copy
+            relative_dir (str): the path of the copy, relative to
+                the output directory
+
+        Returns:
+            int: the number of copied files
+        """
+        copied = 0
+        for root, _, files in os.walk(source_dir):
+            for name in files:
+                source_path = os.path.join(root, name)
+                relative_path = os.path.join(
+                    relative_dir, os.path.relpath(source_path, source_dir)
+                )
+                copied += self.copy(source_path, relative_path)
+
+        return copied
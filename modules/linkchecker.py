@@ -0,0 +1,202 @@
+"""Module for the LinkChecker class, used to check the status of the links."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+import aiohttp
+import toml
+from pydantic import BaseModel
+
+from modules.links import Link
+from modules.settings import LinkCheckerSettings
+
+
+class LinkStatusResponse(BaseModel):
+    """LinkStatusResponse class, used to represent the status of a link."""
+
+    name: str
+    online: bool | None
+    latency: float | None
+    checked_time: float | None
+
+
+@dataclass
+class LinkStatus:
+    """LinkStatus class, used to represent the status of a link."""
+
+    name: str
+    online: bool | None = None
+    latency: float | None = None
+    checked_time: float | None = None
+
+    def toResponse(self) -> LinkStatusResponse:
+        """Convert the LinkStatus object to a LinkStatusResponse object.
+
+        Returns:
+            LinkStatusResponse
+        """
+        return LinkStatusResponse(
+            name=self.name,
+            online=self.online,
+            latency=self.latency,
+            checked_time=self.checked_time,
+        )
+
+
+class LinkChecker:
+    """LinkChecker class, used to check whether the links are reachable.
+
+    All the links are probed concurrently through a single connection pool,
+    with the number of in-flight requests bounded by a semaphore.
+    The results are cached and only refreshed by checkLinks, so serving
+    them never waits on the network.
+    """
+
+    _settings_path: str
+    _settings: LinkCheckerSettings
+    _links: list[Link]
+    _statuses: dict[str, LinkStatus]
+    _generation: int
+    _semaphore: asyncio.BoundedSemaphore | None
+    _session: aiohttp.ClientSession | None
+
+    def __init__(
+        self,
+        links: list[Link],
+        settings_path: str = "settings/settings.toml",
+    ) -> LinkChecker:
+        """Create a LinkChecker object.
+
+        Args:
+            links (list[Link]): the links to check
+            settings_path (str, optional): Path to the settings file.
+                Defaults to "settings/settings.toml".
+
+        Returns:
+            LinkChecker
+        """
+        logging.info("Initializing LinkChecker")
+        self._settings_path = settings_path
+        # the session and the semaphore must be created inside the event loop
+        self._session = None
+        self._semaphore = None
+        self._generation = 0
+
+        self._loadSettings()
+        self.setLinks(links)
+
+    def _loadSettings(self) -> None:
+        """Load the settings from the settings file, using the defaults if missing."""
+        with open(self._settings_path, "r") as f:
+            settings = toml.load(f).get(self.__class__.__name__, {})
+
+        self._settings = LinkCheckerSettings.fromDict(settings)
+
+    def _getSession(self) -> aiohttp.ClientSession:
+        """Get the shared client session, creating it if needed.
+
+        Returns:
+            aiohttp.ClientSession
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._settings.max_concurrency,
+                ttl_dns_cache=300,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self._settings.timeout,
+                sock_connect=self._settings.timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+            )
+            self._semaphore = asyncio.BoundedSemaphore(self._settings.max_concurrency)
+
+        return self._session
+
+    def setLinks(self, links: list[Link]) -> None:
+        """Set the links to check.
+
+        The status of the links that were already checked is kept.
+
+        Args:
+            links (list[Link]): the links to check
+        """
+        self._links = links
+        self._generation += 1
+        old_statuses = getattr(self, "_statuses", {})
+        self._statuses = {}
+        for link in links:
+            status = old_statuses.get(link.name, LinkStatus(link.display_name))
+            status.name = link.display_name
+            link.online = status.online
+            self._statuses[link.name] = status
+
+    async def _checkLink(self, link: Link) -> None:
+        """Check a single link and update its status.
+
+        Any HTTP response means that the service is up; connection errors and
+        timeouts mean that it is down.
+
+        Args:
+            link (Link): the link to check
+        """
+        session = self._getSession()
+        async with self._semaphore:
+            started_time = datetime.now().timestamp()
+            try:
+                async with session.head(link.lan_url, allow_redirects=False):
+                    online = True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                online = False
+            checked_time = datetime.now().timestamp()
+
+        status = self._statuses.get(link.name)
+        if status is None:
+            # the link has been removed while it was being checked
+            return
+
+        status.online = online
+        status.latency = checked_time - started_time if online else None
+        status.checked_time = checked_time
+        if link.online != online:
+            self._generation += 1
+        link.online = online
+
+    async def checkLinks(self) -> None:
+        """Check all the links concurrently."""
+        logging.info(f"Checking {len(self._links)} links")
+        started_time = datetime.now()
+        await asyncio.gather(*(self._checkLink(link) for link in self._links))
+        elapsed = (datetime.now() - started_time).total_seconds()
+        online = sum(1 for s in self._statuses.values() if s.online)
+        logging.info(f"Checked links in {elapsed} seconds, {online} online")
+
+    def getStatuses(self) -> list[LinkStatus]:
+        """Get the cached status of the links.
+
+        Returns:
+            list[LinkStatus]
+        """
+        return [self._statuses[link.name] for link in self._links]
+
+    async def close(self) -> None:
+        """Close the shared client session."""
+        if self._session is not None and not self._session.closed:
+            logging.info("Closing LinkChecker session")
+            await self._session.close()
+
+    @property
+    def generation(self) -> int:
+        """Get a counter increased every time the status of a link changes."""
+        return self._generation
+
+    @property
+    def check_interval(self) -> int:
+        """Get the interval between two checks, in seconds."""
+        return self._settings.check_interval
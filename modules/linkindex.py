@@ -0,0 +1,269 @@
+"""Module for the LinkIndex class, used to search through the links."""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from modules.links import Link
+
+
+class LinkSearchResponse(BaseModel):
+    """LinkSearchResponse class, used to represent a link search result."""
+
+    name: str
+    href: str
+    online: bool | None
+    match: str
+    score: int
+
+
+@dataclass
+class LinkMatch:
+    """LinkMatch class, used to represent a link matching a query."""
+
+    link: Link
+    match: str
+    score: int
+
+    def toResponse(self, lan: bool = False) -> LinkSearchResponse:
+        """Convert the LinkMatch object to a LinkSearchResponse object.
+
+        Args:
+            lan (bool, optional): True if the link is accessed through
+                the local network. Defaults to False.
+
+        Returns:
+            LinkSearchResponse
+        """
+        properties = self.link.getPropertiesDict(lan)
+        return LinkSearchResponse(
+            name=properties["name"],
+            href=properties["href"],
+            online=properties["online"],
+            match=self.match,
+            score=self.score,
+        )
+
+
+class LinkIndex:
+    """LinkIndex class, used to search the links by name and display name.
+
+    The index is built once from the links and only rebuilt when they change.
+    It supports, in order of ranking:
+        - exact matches
+        - prefix matches, through a sorted list of keys
+        - word prefix and substring matches, through a trigram index
+        - fuzzy (subsequence) matches, pruned by a bitmask of the characters
+    """
+
+    # match kinds, ordered by rank
+    _MATCHES = ("exact", "prefix", "word", "substring", "fuzzy")
+
+    _links: list[Link]
+    _fingerprint: tuple
+    _keys: list[str]
+    _key_links: list[int]
+    _sorted_keys: list[tuple[str, int]]
+    _trigrams: dict[str, set[int]]
+    _masks: list[int]
+
+    def __init__(self, links: list[Link]) -> LinkIndex:
+        """Create a LinkIndex object.
+
+        Args:
+            links (list[Link]): the links to index
+
+        Returns:
+            LinkIndex
+        """
+        self._fingerprint = None
+        self.update(links)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize a string for the comparison.
+
+        Args:
+            text (str): the string to normalize
+
+        Returns:
+            str
+        """
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def _charMask(text: str) -> int:
+        """Get a bitmask of the characters in a string.
+
+        Args:
+            text (str): the string
+
+        Returns:
+            int
+        """
+        mask = 0
+        for c in text:
+            mask |= 1 << (ord(c) & 63)
+        return mask
+
+    @staticmethod
+    def _getFingerprint(links: list[Link]) -> tuple:
+        """Get a fingerprint of the indexed properties of the links.
+
+        Args:
+            links (list[Link]): the links
+
+        Returns:
+            tuple
+        """
+        return tuple((link.name, link.display_name) for link in links)
+
+    def update(self, links: list[Link]) -> None:
+        """Update the indexed links, rebuilding the index only if they changed.
+
+        Args:
+            links (list[Link]): the links to index
+        """
+        fingerprint = self._getFingerprint(links)
+        # the links objects might have been replaced, so keep the new ones
+        self._links = links
+        if fingerprint == self._fingerprint:
+            return
+
+        logging.info(f"Building link index for {len(links)} links")
+        self._fingerprint = fingerprint
+        # each link is indexed both by name and by display name
+        self._keys = []
+        self._key_links = []
+        for i, link in enumerate(links):
+            keys = {self._normalize(link.display_name), self._normalize(link.name)}
+            for key in sorted(keys):
+                if not key:
+                    continue
+                self._keys.append(key)
+                self._key_links.append(i)
+
+        self._sorted_keys = sorted((key, k) for k, key in enumerate(self._keys))
+        self._masks = [self._charMask(key) for key in self._keys]
+        self._trigrams = {}
+        for k, key in enumerate(self._keys):
+            for t in range(len(key) - 2):
+                self._trigrams.setdefault(key[t : t + 3], set()).add(k)
+
+        logging.info(f"Built link index with {len(self._keys)} keys")
+
+    def _prefixKeys(self, query: str) -> list[int]:
+        """Get the keys starting with the query.
+
+        Args:
+            query (str): the normalized query
+
+        Returns:
+            list[int]: indexes of the keys
+        """
+        found = []
+        start = bisect_left(self._sorted_keys, (query, -1))
+        for key, k in self._sorted_keys[start:]:
+            if not key.startswith(query):
+                break
+            found.append(k)
+        return found
+
+    def _substringKeys(self, query: str) -> list[int]:
+        """Get the keys containing the query.
+
+        Args:
+            query (str): the normalized query
+
+        Returns:
+            list[int]: indexes of the keys
+        """
+        if len(query) < 3:
+            # too short for the trigram index, scan all the keys
+            candidates = range(len(self._keys))
+        else:
+            trigrams = [
+                self._trigrams.get(query[t : t + 3], set())
+                for t in range(len(query) - 2)
+            ]
+            trigrams.sort(key=len)
+            candidates = sorted(set.intersection(*trigrams))
+
+        return [k for k in candidates if query in self._keys[k]]
+
+    def _fuzzyKeys(self, query: str) -> list[tuple[int, int]]:
+        """Get the keys containing all the characters of the query, in order.
+
+        Args:
+            query (str): the normalized query
+
+        Returns:
+            list[tuple[int, int]]: indexes of the keys and their spread,
+                i.e. the number of characters skipped to match the query
+        """
+        query_mask = self._charMask(query)
+        found = []
+        for k, key in enumerate(self._keys):
+            if query_mask & ~self._masks[k]:
+                continue
+
+            pos = -1
+            start = None
+            for c in query:
+                pos = key.find(c, pos + 1)
+                if pos == -1:
+                    break
+                if start is None:
+                    start = pos
+            else:
+                found.append((k, pos - start + 1 - len(query)))
+
+        return found
+
+    def search(self, query: str, limit: int = 10) -> list[LinkMatch]:
+        """Search the links matching a query.
+
+        Args:
+            query (str): the query
+            limit (int, optional): maximum number of results. Defaults to 10.
+
+        Returns:
+            list[LinkMatch]: the matching links, best matches first
+        """
+        query = self._normalize(query)
+        if not query:
+            return [LinkMatch(link, "all", 0) for link in self._links[:limit]]
+
+        # best (rank, tiebreak) for each link
+        best: dict[int, tuple[int, int]] = {}
+
+        def add(k: int, rank: int, tiebreak: int) -> None:
+            i = self._key_links[k]
+            if i not in best or (rank, tiebreak) < best[i]:
+                best[i] = (rank, tiebreak)
+
+        for k in self._prefixKeys(query):
+            rank = 0 if self._keys[k] == query else 1
+            add(k, rank, len(self._keys[k]))
+
+        for k in self._substringKeys(query):
+            pos = self._keys[k].find(query)
+            rank = 2 if pos > 0 and self._keys[k][pos - 1] in " -_." else 3
+            add(k, rank, pos)
+
+        for k, spread in self._fuzzyKeys(query):
+            add(k, 4, spread)
+
+        ranked = sorted(best.items(), key=lambda item: (item[1], item[0]))
+        return [
+            LinkMatch(
+                link=self._links[i],
+                match=self._MATCHES[rank],
+                score=rank * 1000 + min(tiebreak, 999),
+            )
+            for i, (rank, tiebreak) in ranked[:limit]
+        ]
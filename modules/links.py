@@ -34,6 +34,8 @@ class Link:
         self._ip = ip
         self._port = port
         self._path = path
+        # the status is unknown until the link is checked
+        self._online = None
 
     @staticmethod
     def fromDict(dictionary: dict) -> Link:
@@ -62,7 +64,7 @@ class Link:
 
         return self.lan_url
 
-    def getPropertiesDict(self, lan: bool = False) -> dict[str, str]:
+    def getPropertiesDict(self, lan: bool = False) -> dict[str, str | bool | None]:
         """Get the properties as a dictionary.
 
         Args:
@@ -70,9 +72,9 @@ class Link:
                 the local network. Defaults to False.
 
         Returns:
-            dict[str, str]
+            dict[str, str | bool | None]
         """
-        properties = {"name": self._display_name}
+        properties = {"name": self._display_name, "online": self._online}
 
         if lan:
             properties["href"] = self.lan_url
@@ -101,3 +103,21 @@ class Link:
     def display_name(self) -> str:
         """Get the displayed name of the service."""
         return self._display_name
+
+    @property
+    def name(self) -> str:
+        """Get the short name of the service."""
+        return self._name
+
+    @property
+    def online(self) -> bool | None:
+        """Get whether the service is reachable.
+
+        None if the service has not been checked yet.
+        """
+        return self._online
+
+    @online.setter
+    def online(self, value: bool | None) -> None:
+        """Set whether the service is reachable."""
+        self._online = value
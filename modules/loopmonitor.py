@@ -0,0 +1,226 @@
+"""Module for the LoopMonitor class, used to monitor the event loop lag."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+
+from pydantic import BaseModel
+
+from modules.settings import LoopMonitorSettings
+
+
+class BlockingCallResponse(BaseModel):
+    """BlockingCallResponse class, used to represent a blocking call."""
+
+    time: float
+    duration: float
+    stack: list[str]
+
+
+class LoopLagResponse(BaseModel):
+    """LoopLagResponse class, used to represent the event loop lag."""
+
+    samples: int
+    mean: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+    histogram: dict[str, int]
+    blocking_calls: list[BlockingCallResponse]
+
+
+@dataclass
+class BlockingCall:
+    """BlockingCall class, used to represent a callback blocking the loop."""
+
+    time: float
+    # how long the loop was blocked in milliseconds,
+    # updated when the loop runs again
+    duration: float
+    stack: list[str]
+
+    def toResponse(self) -> BlockingCallResponse:
+        """Convert the BlockingCall object to a BlockingCallResponse object.
+
+        Returns:
+            BlockingCallResponse
+        """
+        return BlockingCallResponse(
+            time=self.time,
+            duration=self.duration,
+            stack=self.stack,
+        )
+
+
+class LoopMonitor:
+    """LoopMonitor class, used to monitor the lag of the event loop.
+
+    A task sleeping for a fixed interval measures how late it wakes up,
+    which is the time the loop spent running other callbacks.
+    A watchdog thread checks that the task keeps waking up: when it does
+    not for longer than the threshold, the stack of the loop thread is
+    captured while the offending code is still running.
+    """
+
+    # upper bounds of the histogram buckets, in milliseconds
+    _BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    _settings: LoopMonitorSettings
+    _histogram: list[int]
+    _recent: deque[float]
+    _blocking_calls: deque[BlockingCall]
+    _pending_call: BlockingCall | None
+    _count: int
+    _total: float
+    _max: float
+    _heartbeat: float
+    _task: asyncio.Task | None
+    _watchdog: threading.Thread | None
+    _stopped: threading.Event
+    _loop_thread_id: int | None
+
+    def __init__(self, settings: LoopMonitorSettings) -> LoopMonitor:
+        """Create a LoopMonitor object.
+
+        Args:
+            settings (LoopMonitorSettings): the settings of the monitor
+
+        Returns:
+            LoopMonitor
+        """
+        self._settings = settings
+        self._histogram = [0] * (len(self._BUCKETS) + 1)
+        self._recent = deque(maxlen=settings.recent_samples)
+        self._blocking_calls = deque(maxlen=settings.max_blocking_calls)
+        self._pending_call = None
+        self._count = 0
+        self._total = 0
+        self._max = 0
+        self._heartbeat = time.monotonic()
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+
+    def _record(self, lag: float) -> None:
+        """Record a lag sample.
+
+        Args:
+            lag (float): the lag, in seconds
+        """
+        lag_ms = lag * 1000
+        self._count += 1
+        self._total += lag_ms
+        self._max = max(self._max, lag_ms)
+        self._recent.append(lag_ms)
+
+        for i, bound in enumerate(self._BUCKETS):
+            if lag_ms <= bound:
+                self._histogram[i] += 1
+                return
+        self._histogram[-1] += 1
+
+    async def _sample(self) -> None:
+        """Sample the lag of the loop, until cancelled."""
+        interval = self._settings.interval
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0, now - expected)
+            self._record(lag)
+
+            # the loop is running again, so the blocking call has ended
+            if self._pending_call is not None:
+                self._pending_call.duration = lag * 1000
+                self._pending_call = None
+
+    def _watch(self) -> None:
+        """Capture the stack of the loop thread when the loop is blocked."""
+        threshold = self._settings.blocking_threshold
+        reported = None
+        while not self._stopped.wait(threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self._settings.interval
+            if blocked < threshold or heartbeat == reported:
+                continue
+
+            # report each blocking call only once
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+
+            stack = traceback.format_stack(frame)
+            call = BlockingCall(time.time(), blocked * 1000, stack)
+            self._blocking_calls.append(call)
+            self._pending_call = call
+            logging.warning(
+                f"Event loop blocked for {blocked:.3f}s in:\n{''.join(stack[-5:])}"
+            )
+
+    def start(self) -> None:
+        """Start the monitor, from the event loop."""
+        logging.info("Starting loop monitor")
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            name="LoopMonitorWatchdog",
+            daemon=True,
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        """Stop the monitor."""
+        logging.info("Stopping loop monitor")
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def _percentile(self, samples: list[float], percentile: float) -> float:
+        """Get a percentile of the sorted samples.
+
+        Args:
+            samples (list[float]): the sorted samples
+            percentile (float): the percentile, between 0 and 1
+
+        Returns:
+            float
+        """
+        if not samples:
+            return 0
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+    def toResponse(self) -> LoopLagResponse:
+        """Convert the LoopMonitor stats to a LoopLagResponse object.
+
+        The percentiles are computed on the recent samples, the other stats
+        since the start of the monitor. Times are in milliseconds.
+
+        Returns:
+            LoopLagResponse
+        """
+        recent = sorted(self._recent)
+        labels = [f"<={b}ms" for b in self._BUCKETS] + [f">{self._BUCKETS[-1]}ms"]
+        return LoopLagResponse(
+            samples=self._count,
+            mean=self._total / self._count if self._count else 0,
+            max=self._max,
+            p50=self._percentile(recent, 0.5),
+            p90=self._percentile(recent, 0.9),
+            p99=self._percentile(recent, 0.99),
+            histogram=dict(zip(labels, self._histogram)),
+            blocking_calls=[c.toResponse() for c in self._blocking_calls],
+        )
@@ -0,0 +1,292 @@
+"""Module for the NewsService class, used to get the headlines of RSS and Atom feeds."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import partial
+from xml.etree.ElementTree import Element, XMLPullParser
+
+from pydantic import BaseModel
+
+from modules.cachedservice import CachedService
+from modules.settings import NewsSettings
+
+
+class NewsItemResponse(BaseModel):
+    """NewsItemResponse class, used to represent a news item response."""
+
+    title: str
+    link: str
+    source: str | None
+    published: float | None
+
+
+@dataclass
+class NewsItem:
+    """NewsItem class, used to represent an item of a feed."""
+
+    title: str
+    link: str
+    source: str | None = None
+    published: float | None = None
+
+    def toResponse(self) -> NewsItemResponse:
+        """Convert the NewsItem object to a NewsItemResponse object."""
+        return NewsItemResponse(
+            title=self.title,
+            link=self.link,
+            source=self.source,
+            published=self.published,
+        )
+
+
+@dataclass
+class Feed:
+    """Feed class, used to represent the last response of a feed."""
+
+    items: list[NewsItem]
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class NewsService(CachedService):
+    """NewsService class, used to get the headlines of RSS and Atom feeds.
+
+    The feeds are requested conditionally, so an unchanged feed costs a 304
+    response, and parsed while they are downloaded: each item is dropped
+    from the tree as soon as it is read, and the download stops once enough
+    items have been read.
+    """
+
+    _settings_class = NewsSettings
+    # size of the chunks fed to the parser, in bytes
+    _CHUNK_SIZE = 16384
+
+    _settings: NewsSettings
+    _feeds: dict[str, Feed]
+    _merged: list[NewsItem]
+    _merged_from: list[Feed]
+
+    def __init__(
+        self,
+        settings_path: str = "settings/settings.toml",
+        overrides: dict | None = None,
+    ) -> NewsService:
+        """Create a NewsService object.
+
+        Args:
+            settings_path (str, optional): Path to the settings file.
+                Defaults to "settings/settings.toml".
+            overrides (dict, optional): Settings overriding the ones in the
+                settings file. Defaults to None.
+
+        Returns:
+            NewsService
+        """
+        super().__init__(settings_path, overrides)
+        self._feeds = {}
+        self._merged = []
+        self._merged_from = []
+
+    @staticmethod
+    def _localName(tag: str) -> str:
+        """Get the name of a tag without its namespace."""
+        return tag.rsplit("}", 1)[-1]
+
+    @staticmethod
+    def _parseTime(text: str | None) -> float | None:
+        """Parse a RFC 822 (RSS) or ISO 8601 (Atom) time to a timestamp.
+
+        Args:
+            text (str | None): the time
+
+        Returns:
+            float | None: the timestamp, None if missing or invalid
+        """
+        if not text:
+            return None
+
+        text = text.strip()
+        try:
+            return parsedate_to_datetime(text).timestamp()
+        except (TypeError, ValueError):
+            pass
+        try:
+            return datetime.fromisoformat(text).timestamp()
+        except ValueError:
+            return None
+
+    def _parseItem(self, element: Element, source: str | None) -> NewsItem | None:
+        """Parse a RSS item or an Atom entry.
+
+        Args:
+            element (Element): the item element
+            source (str | None): the title of the feed
+
+        Returns:
+            NewsItem | None: the item, None if it has no title or link
+        """
+        title = link = published = None
+        for child in element:
+            name = self._localName(child.tag)
+            if name == "title":
+                title = (child.text or "").strip()
+            elif name == "link":
+                # Atom links are in the attributes, RSS links in the text
+                rel = child.get("rel", "alternate")
+                href = child.get("href") or (child.text or "").strip()
+                if href and rel == "alternate" and link is None:
+                    link = href
+            elif name == "guid" and link is None:
+                if child.get("isPermaLink", "true") == "true":
+                    link = (child.text or "").strip() or None
+            elif name in ("pubDate", "published", "updated", "date"):
+                published = published or self._parseTime(child.text)
+
+        if not title or not link:
+            return None
+
+        return NewsItem(title=title, link=link, source=source, published=published)
+
+    async def _requestFeed(self, url: str) -> Feed:
+        """Request a feed, parsing it while it is downloaded.
+
+        Args:
+            url (str): the url of the feed
+
+        Returns:
+            Feed
+        """
+        previous = self._feeds.get(url)
+        headers = {}
+        if previous is not None:
+            if previous.etag is not None:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified is not None:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        async with self._getSession().get(url, headers=headers) as response:
+            if response.status == 304 and previous is not None:
+                logging.info(f"Feed {url} not modified")
+                return previous
+            if response.status != 200:
+                raise Exception(
+                    f"Request to {url} returned status code {response.status}"
+                )
+
+            parser = XMLPullParser(events=("start", "end"))
+            items = []
+            source = None
+            in_item = False
+            async for chunk in response.content.iter_chunked(self._CHUNK_SIZE):
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    name = self._localName(element.tag)
+                    if name in ("item", "entry"):
+                        in_item = event == "start"
+                        if event == "end":
+                            item = self._parseItem(element, source)
+                            if item is not None:
+                                items.append(item)
+                            # drop the parsed item from the tree
+                            element.clear()
+                    elif event == "end" and name == "title" and not in_item:
+                        source = source or (element.text or "").strip() or None
+
+                if len(items) >= self._settings.max_items:
+                    # enough items, skip the rest of the feed
+                    break
+
+            feed = Feed(
+                items=items[: self._settings.max_items],
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+        self._feeds[url] = feed
+        return feed
+
+    async def _getFeed(self, url: str) -> Feed:
+        """Request a feed within the request deadline."""
+        return await asyncio.wait_for(
+            self._requestFeed(url), self._settings.request_timeout
+        )
+
+    def _mergeItems(self, feeds: list[Feed]) -> list[NewsItem]:
+        """Merge the items of the feeds, newest first, without duplicates.
+
+        Args:
+            feeds (list[Feed]): the feeds
+
+        Returns:
+            list[NewsItem]
+        """
+        items = sorted(
+            (item for feed in feeds for item in feed.items),
+            key=lambda item: item.published or 0,
+            reverse=True,
+        )
+
+        merged = []
+        seen = set()
+        for item in items:
+            keys = (item.link, item.title.casefold())
+            if seen.intersection(keys):
+                continue
+            seen.update(keys)
+            merged.append(item)
+            if len(merged) >= self._settings.max_items:
+                break
+
+        return merged
+
+    async def _requestNews(self, force: bool = False) -> list[NewsItem]:
+        """Get the feeds concurrently, requesting the expired ones.
+
+        Args:
+            force (bool, optional): whether to request the feeds even if
+                they have not expired. Defaults to False.
+
+        Returns:
+            list[NewsItem]: the merged items
+        """
+        results = await asyncio.gather(
+            *(
+                self._getCached(
+                    url,
+                    self._settings.cache_duration,
+                    partial(self._getFeed, url),
+                    force,
+                )
+                for url in self._settings.feeds
+            ),
+            return_exceptions=True,
+        )
+
+        feeds = []
+        for url, result in zip(self._settings.feeds, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Cannot fetch feed {url}: {result!r}")
+                continue
+            feeds.append(result)
+
+        # merge again only if a feed has changed
+        if len(feeds) != len(self._merged_from) or any(
+            a is not b for a, b in zip(feeds, self._merged_from)
+        ):
+            self._merged = self._mergeItems(feeds)
+            self._merged_from = feeds
+
+        return self._merged
+
+    async def refresh(self) -> None:
+        """Request all the feeds, ahead of their expiration."""
+        await self._requestNews(force=True)
+
+    async def getNews(self) -> list[NewsItem]:
+        """Get the latest items of the feeds, newest first."""
+        return await self._requestNews()
@@ -0,0 +1,256 @@
+"""Module for the PhotoHistory class, used to store the served photos."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from modules.settings import PhotoHistorySettings
+from modules.unsplash import UnsplashPhoto, UnsplashResponse
+
+
+class PhotoHistoryItemResponse(UnsplashResponse):
+    """PhotoHistoryItemResponse class, used to represent a stored photo."""
+
+    id: int
+    served_time: float
+    query: str | None
+
+
+class PhotoHistoryResponse(BaseModel):
+    """PhotoHistoryResponse class, used to represent a page of stored photos."""
+
+    photos: list[PhotoHistoryItemResponse]
+    next_cursor: int | None
+
+
+class PhotoHistory:
+    """PhotoHistory class, used to store the served photos in SQLite.
+
+    The photos are paginated by keyset on their id, which grows with the time
+    they were served, so each page costs an index lookup regardless of how
+    many photos are stored. Only the latest photos are kept.
+    The database is accessed from a worker thread, to avoid blocking the loop.
+    """
+
+    # columns of the photos table, other than the id
+    _COLUMNS = (
+        "served_time",
+        "tenant",
+        "query",
+        "url",
+        "raw_url",
+        "link",
+        "blur_hash",
+        "photographer",
+        "photographer_url",
+        "location",
+        "description",
+        "color",
+    )
+
+    _settings: PhotoHistorySettings
+    _connection: sqlite3.Connection
+    _lock: threading.Lock
+
+    def __init__(self, settings: PhotoHistorySettings) -> PhotoHistory:
+        """Create a PhotoHistory object.
+
+        Args:
+            settings (PhotoHistorySettings): the settings of the history
+
+        Returns:
+            PhotoHistory
+        """
+        logging.info(f"Initializing PhotoHistory in {settings.path}")
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(settings.path, check_same_thread=False)
+        self._createTables()
+
+    def _createTables(self) -> None:
+        """Create the table and the indexes, if missing."""
+        with self._lock, self._connection as c:
+            # WAL and normal sync reduce the writes on the SD card
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            c.execute(
+                "CREATE TABLE IF NOT EXISTS photos ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "served_time REAL NOT NULL, tenant TEXT, "
+                "query TEXT, url TEXT, raw_url TEXT, link TEXT, blur_hash TEXT, "
+                "photographer TEXT, photographer_url TEXT, location TEXT, "
+                "description TEXT, color TEXT)"
+            )
+            # databases created before the photos were stored by tenant
+            columns = [row[1] for row in c.execute("PRAGMA table_info(photos)")]
+            if "tenant" not in columns:
+                c.execute("ALTER TABLE photos ADD COLUMN tenant TEXT")
+            c.execute(
+                "CREATE INDEX IF NOT EXISTS photos_tenant ON photos (tenant, id)"
+            )
+            c.execute(
+                "CREATE INDEX IF NOT EXISTS photos_served_time "
+                "ON photos (served_time)"
+            )
+            c.execute("CREATE INDEX IF NOT EXISTS photos_query ON photos (query, id)")
+            c.execute(
+                "CREATE INDEX IF NOT EXISTS photos_photographer "
+                "ON photos (photographer, id)"
+            )
+
+    def _add(
+        self, photo: UnsplashPhoto, tenant: str | None, served_time: float
+    ) -> None:
+        """Store a photo and drop the oldest ones above the retention cap.
+
+        Args:
+            photo (UnsplashPhoto): the photo
+            tenant (str | None): the tenant the photo was served to
+            served_time (float): the time the photo was first served
+        """
+        values = (served_time, tenant, photo.query) + tuple(
+            getattr(photo, column) for column in self._COLUMNS[3:]
+        )
+        placeholders = ", ".join("?" * len(self._COLUMNS))
+        with self._lock, self._connection as c:
+            cursor = c.execute(
+                f"INSERT INTO photos ({', '.join(self._COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                values,
+            )
+            c.execute(
+                "DELETE FROM photos WHERE id <= ?",
+                (cursor.lastrowid - self._settings.max_photos,),
+            )
+
+    async def add(self, photo: UnsplashPhoto, tenant: str | None = None) -> None:
+        """Store a photo.
+
+        Args:
+            photo (UnsplashPhoto): the photo
+            tenant (str, optional): the tenant the photo was served to.
+                Defaults to None.
+        """
+        served_time = datetime.now().timestamp()
+        try:
+            await asyncio.to_thread(self._add, photo, tenant, served_time)
+        except sqlite3.Error as e:
+            logging.error(f"Cannot store photo: {e}")
+
+    def _getPage(
+        self,
+        tenant: str | None,
+        limit: int,
+        cursor: int | None,
+        query: str | None,
+        photographer: str | None,
+        before: float | None,
+    ) -> PhotoHistoryResponse:
+        """Get a page of photos, newest first.
+
+        Args:
+            tenant (str | None): only get the photos of a tenant
+            limit (int): maximum number of photos
+            cursor (int | None): id of the last photo of the previous page
+            query (str | None): only get the photos of a query
+            photographer (str | None): only get the photos of a photographer
+            before (float | None): only get the photos served before a time
+
+        Returns:
+            PhotoHistoryResponse
+        """
+        conditions = []
+        params = []
+        with self._lock:
+            if tenant is not None:
+                conditions.append("tenant = ?")
+                params.append(tenant)
+            if before is not None:
+                # ids grow with the time, so the time is turned into an id
+                row = self._connection.execute(
+                    "SELECT max(id) FROM photos WHERE served_time < ?", (before,)
+                ).fetchone()
+                conditions.append("id <= ?")
+                params.append(row[0] if row[0] is not None else 0)
+            if cursor is not None:
+                conditions.append("id < ?")
+                params.append(cursor)
+            if query is not None:
+                conditions.append("query = ?")
+                params.append(query)
+            if photographer is not None:
+                conditions.append("photographer = ?")
+                params.append(photographer)
+
+            where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+            rows = self._connection.execute(
+                f"SELECT id, {', '.join(self._COLUMNS)} FROM photos "
+                f"{where}ORDER BY id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        photos = []
+        for row in rows[:limit]:
+            data = dict(zip(("id",) + self._COLUMNS, row))
+            photo = UnsplashPhoto(
+                **{
+                    k: v
+                    for k, v in data.items()
+                    if k not in ("id", "served_time", "tenant")
+                }
+            )
+            photos.append(
+                PhotoHistoryItemResponse(
+                    **photo.toResponse().model_dump(),
+                    id=data["id"],
+                    served_time=data["served_time"],
+                    query=data["query"],
+                )
+            )
+
+        # an extra row means that there is another page
+        next_cursor = photos[-1].id if len(rows) > limit else None
+        return PhotoHistoryResponse(photos=photos, next_cursor=next_cursor)
+
+    async def getPage(
+        self,
+        tenant: str | None = None,
+        limit: int = 20,
+        cursor: int | None = None,
+        query: str | None = None,
+        photographer: str | None = None,
+        before: float | None = None,
+    ) -> PhotoHistoryResponse:
+        """Get a page of photos, newest first.
+
+        Args:
+            tenant (str, optional): only get the photos of a tenant.
+                Defaults to None.
+            limit (int, optional): maximum number of photos. Defaults to 20.
+            cursor (int, optional): id of the last photo of the previous page.
+                Defaults to None.
+            query (str, optional): only get the photos of a query.
+                Defaults to None.
+            photographer (str, optional): only get the photos of a
+                photographer. Defaults to None.
+            before (float, optional): only get the photos served before a
+                timestamp. Defaults to None.
+
+        Returns:
+            PhotoHistoryResponse
+        """
+        return await asyncio.to_thread(
+            self._getPage, tenant, limit, cursor, query, photographer, before
+        )
+
+    def close(self) -> None:
+        """Close the database."""
+        logging.info("Closing PhotoHistory")
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,224 @@
+"""Module for the RateLimiter class, used to limit the requests of the clients."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from pydantic import BaseModel
+
+from modules.settings import RateLimiterSettings
+
+
+class RateLimitStatsResponse(BaseModel):
+    """RateLimitStatsResponse class, used to represent the rate limit stats."""
+
+    allowed: dict[str, int]
+    limited: dict[str, int]
+    not_found: int
+    clients: int
+    evicted: int
+
+
+class TokenBucket:
+    """TokenBucket class, used to represent the tokens left to a client."""
+
+    __slots__ = ("tokens", "updated_time")
+
+    def __init__(self, tokens: float, updated_time: float) -> TokenBucket:
+        """Create a TokenBucket object.
+
+        Args:
+            tokens (float): tokens in the bucket
+            updated_time (float): time of the last update
+
+        Returns:
+            TokenBucket
+        """
+        self.tokens = tokens
+        self.updated_time = updated_time
+
+
+class RateLimiter:
+    """RateLimiter class, used to limit the requests per client and route group.
+
+    Each client ip gets a token bucket for each route group.
+    The buckets are kept in a LRU of bounded size, so the memory used does
+    not grow with the number of clients.
+    """
+
+    _settings: RateLimiterSettings
+    _groups: dict[str, tuple[float, float]]
+    _buckets: OrderedDict[tuple[str, str], TokenBucket]
+
+    allowed: dict[str, int]
+    limited: dict[str, int]
+    not_found: int
+    evicted: int
+
+    def __init__(self, settings: RateLimiterSettings) -> RateLimiter:
+        """Create a RateLimiter object.
+
+        Args:
+            settings (RateLimiterSettings): the settings of the limiter
+
+        Returns:
+            RateLimiter
+        """
+        self._settings = settings
+        # rate (tokens per second) and burst of each group
+        self._groups = {
+            "image": (settings.image_rate, settings.image_burst),
+            "api": (settings.api_rate, settings.api_burst),
+            "page": (settings.page_rate, settings.page_burst),
+        }
+        for group, (rate, burst) in self._groups.items():
+            if rate < 0 or burst < 0:
+                raise ValueError(f"Negative rate or burst for the {group} group")
+        self._buckets = OrderedDict()
+
+        self.allowed = dict.fromkeys(self._groups, 0)
+        self.limited = dict.fromkeys(self._groups, 0)
+        self.not_found = 0
+        self.evicted = 0
+
+    @staticmethod
+    def getGroup(path: str) -> str | None:
+        """Get the route group of a path.
+
+        Args:
+            path (str): the path of the request
+
+        Returns:
+            str | None: the group, None if the path is not limited
+        """
+        if "/static/" in path:
+            return None
+        # the history does not request unsplash, unlike the photo api
+        if "/get/image/history" in path:
+            return "api"
+        if "/get/image" in path:
+            return "image"
+        if "/get/" in path:
+            return "api"
+        return "page"
+
+    def allow(self, ip: str, group: str) -> bool:
+        """Check whether a request is allowed, consuming a token if so.
+
+        Args:
+            ip (str): ip of the client
+            group (str): route group of the request
+
+        Returns:
+            bool
+        """
+        rate, burst = self._groups[group]
+        now = time.monotonic()
+        key = (ip, group)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self._settings.max_clients:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._buckets.move_to_end(key)
+            refill = (now - bucket.updated_time) * rate
+            bucket.tokens = min(burst, bucket.tokens + refill)
+            bucket.updated_time = now
+
+        if bucket.tokens < 1:
+            self.limited[group] += 1
+            return False
+
+        bucket.tokens -= 1
+        self.allowed[group] += 1
+        return True
+
+    def retryAfter(self, group: str) -> int:
+        """Get the seconds after which a limited client gets a new token.
+
+        Args:
+            group (str): route group of the request
+
+        Returns:
+            int
+        """
+        rate, _ = self._groups[group]
+        if rate <= 0:
+            # the bucket is never refilled
+            return 3600
+        return max(1, round(1 / rate))
+
+    def toResponse(self) -> RateLimitStatsResponse:
+        """Convert the RateLimiter stats to a RateLimitStatsResponse object.
+
+        Returns:
+            RateLimitStatsResponse
+        """
+        return RateLimitStatsResponse(
+            allowed=self.allowed,
+            limited=self.limited,
+            not_found=self.not_found,
+            clients=len(self._buckets),
+            evicted=self.evicted,
+        )
+
+
+class RateLimitMiddleware:
+    """RateLimitMiddleware class, an ASGI middleware limiting the requests.
+
+    The limited requests are answered with a constant 429 response,
+    without reaching the app.
+    """
+
+    _BODY = b'{"detail":"Too Many Requests"}'
+
+    def __init__(self, app: Callable, limiter: RateLimiter) -> RateLimitMiddleware:
+        """Create a RateLimitMiddleware object.
+
+        Args:
+            app (Callable): the ASGI app to wrap
+            limiter (RateLimiter): the rate limiter
+
+        Returns:
+            RateLimitMiddleware
+        """
+        self._app = app
+        self._limiter = limiter
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """Handle an ASGI call.
+
+        Args:
+            scope (dict): the ASGI scope
+            receive (Callable): the ASGI receive channel
+            send (Callable): the ASGI send channel
+        """
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        group = self._limiter.getGroup(scope["path"])
+        client = scope.get("client")
+        if group is None or client is None or self._limiter.allow(client[0], group):
+            await self._app(scope, receive, send)
+            return
+
+        retry_after = str(self._limiter.retryAfter(group)).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self._BODY)).encode()),
+                    (b"retry-after", retry_after),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": self._BODY})
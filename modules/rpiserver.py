@@ -2,17 +2,43 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from datetime import datetime
+import os
+from urllib.parse import urlsplit
 
 import toml
 
-from modules.greetings import Greeting
-from modules.links import Link
-from modules.server import HTMLResponse, HTTPException, Request, Server
-from modules.settings import ServerSettings
-from modules.unsplash import UnsplashResponse, UnsplashService
-from modules.weather import WeatherResponse, WeatherService
+from modules.cachedservice import CachedService, ServiceStatsResponse
+from modules.exporter import Exporter
+from modules.linkchecker import LinkStatusResponse
+from modules.linkindex import LinkSearchResponse
+from modules.news import NewsItemResponse
+from modules.photohistory import PhotoHistory, PhotoHistoryResponse
+from modules.ratelimit import RateLimiter, RateLimitMiddleware, RateLimitStatsResponse
+from modules.server import (
+    FileResponse,
+    HTMLResponse,
+    HTTPException,
+    Request,
+    Response,
+    Server,
+)
+from modules.settings import (
+    ExportSettings,
+    LoopMonitorSettings,
+    PhotoHistorySettings,
+    RateLimiterSettings,
+    ServerSettings,
+    Settings,
+    SystemStatsSettings,
+    TenantSettings,
+)
+from modules.systemstats import SystemStats, SystemStatsResponse
+from modules.tenants import Tenant, TenantPrefixMiddleware
+from modules.unsplash import UnsplashResponse
+from modules.weather import WeatherResponse
 
 
 class APIException(HTTPException):
@@ -24,12 +50,19 @@ class APIException(HTTPException):
 class RPiServer(Server):
     """RPiServer class, used to represent the server."""
 
-    _settings: ServerSettings
-    _links: list[Link]
-    _greetings: list[Greeting]
+    # client hints used to pick the size of the background photo
+    _CLIENT_HINTS = "Sec-CH-Viewport-Width, Sec-CH-DPR, Viewport-Width, DPR"
 
-    _weather: WeatherService
-    _unsplash: UnsplashService
+    _settings: ServerSettings
+    _tenants: dict[str, Tenant]
+    _tenants_by_host: dict[str, Tenant]
+    _default_tenant: Tenant
+    _rate_limiter: RateLimiter
+    _redirect_pages: dict[str, bytes]
+    _photo_history: PhotoHistory | None
+    _system_stats: SystemStats | None
+    _export_settings: ExportSettings
+    _exporter: Exporter
 
     def __init__(self, settings_path: str = "settings/settings.toml") -> RPiServer:
         """Create a RPiServer object.
@@ -45,44 +78,309 @@ class RPiServer(Server):
         self._settings_path = settings_path
 
         self._settings = self.loadSettings()
-        self._links, self._greetings = self.loadAttributes()
+
+        history_settings = self._loadOptionalSettings(
+            PhotoHistorySettings, "PhotoHistory"
+        )
+        self._photo_history = None
+        if history_settings.enabled:
+            self._photo_history = PhotoHistory(history_settings)
+
+        self._tenants = self.loadTenants()
 
         logging.info("Initializing RPiServer routes")
         self.addStaticRoute("/static", "static")
         self.addTemplateFolder("templates")
         self.addRoute("/", self._indexPage)
+        self.addRoute("/sw.js", self._serviceWorker)
         self.addRoute("/get/weather", self._weatherApi)
         self.addRoute("/get/image", self._unsplashApi)
+        self.addRoute("/get/image/history", self._photoHistoryApi)
+        self.addRoute("/get/news", self._newsApi)
+        self.addRoute("/get/links", self._linksApi)
+        self.addRoute("/get/links/status", self._linksStatusApi)
+        self.addRoute("/get/ratelimit", self._rateLimitApi)
+        self.addRoute("/get/services", self._servicesApi)
         self.addHTTPExceptionRoute(self._errorPage)
+        self.addCompression()
+        # the redirect page only depends on the tenant, render it once for each
+        redirect_template = self._templates.get_template("redirect.html")
+        self._redirect_pages = {
+            t.name: redirect_template.render(url=f"{t.path_prefix or ''}/").encode()
+            for t in self._tenants.values()
+        }
+
+        prefixes = {
+            t.path_prefix: t.name for t in self._tenants.values() if t.path_prefix
+        }
+        if prefixes:
+            self.addMiddleware(TenantPrefixMiddleware, prefixes=prefixes)
+
+        logging.info("Initializing rate limiter")
+        self._rate_limiter = RateLimiter(
+            self._loadOptionalSettings(RateLimiterSettings, "RateLimiter")
+        )
+        # added last, so that the limited requests skip every other middleware
+        self.addMiddleware(RateLimitMiddleware, limiter=self._rate_limiter)
+
+        loop_monitor_settings = self._loadOptionalSettings(
+            LoopMonitorSettings, "LoopMonitor"
+        )
+        if loop_monitor_settings.enabled:
+            self.addLoopMonitor(loop_monitor_settings)
+
+        system_stats_settings = self._loadOptionalSettings(
+            SystemStatsSettings, "SystemStats"
+        )
+        self._system_stats = None
+        if system_stats_settings.enabled:
+            self._system_stats = SystemStats(system_stats_settings)
+            self.addScheduleInterval(
+                system_stats_settings.interval,
+                self._system_stats.sample,
+                run_now=True,
+            )
+            self.addShutdownHook(self._system_stats.close)
+            self.addRoute("/get/system", self._systemApi)
+
+        for tenant in self._tenants.values():
+            self.addScheduleInterval(
+                tenant.link_checker.check_interval,
+                tenant.link_checker.checkLinks,
+                run_now=True,
+            )
+            self.addShutdownHook(tenant.link_checker.close)
+            for service in (tenant.weather, tenant.unsplash, tenant.news):
+                if service.refresh_interval > 0:
+                    service.scheduleRefresh(self, service.refresh_interval)
+        self.addShutdownHook(CachedService.closeSession)
+        self.addScheduleInterval(
+            self._settings.links_reload_interval,
+            self._reloadLinks,
+        )
+        if self._photo_history is not None:
+            self.addShutdownHook(self._photo_history.close)
+
+    def _loadOptionalSettings(self, cls: type, class_name: str) -> Settings:
+        """Load optional settings, using the defaults if they are missing.
+
+        Args:
+            cls (type): The settings class.
+            class_name (str): The name of the settings in the settings file.
+
+        Returns:
+            Settings
+        """
+        with open(self._settings_path, "r") as f:
+            settings = toml.load(f).get(class_name, {})
 
-        logging.info("Initializing weather")
-        self._weather = WeatherService()
-        logging.info("Initializing unsplash")
-        self._unsplash = UnsplashService()
+        return cls.fromDict(settings)
 
-    def loadAttributes(self) -> tuple[list[Link], list[Greeting]]:
-        """Load the links from the settings file."""
-        logging.info("Loading RPiServer attributes")
+    def loadTenants(self) -> dict[str, Tenant]:
+        """Load the tenants from the settings file.
 
-        logging.info("Loading links")
-        with open(self._settings.links_path, "r") as f:
-            links_dict = toml.load(f)
+        The default tenant uses the links and greetings of the server settings
+        and is served to every request not matching another tenant.
 
-        links = sorted(
-            [Link.fromDict(link) for link in links_dict["Links"]],
-            key=lambda link: len(link.display_name),
-            reverse=True,
+        Returns:
+            dict[str, Tenant]: tenants, keyed by name
+        """
+        logging.info("Loading tenants")
+        with open(self._settings_path, "r") as f:
+            tenants_list = toml.load(f).get("Tenants", [])
+
+        defaults = {
+            "links_path": self._settings.links_path,
+            "greetings_path": self._settings.greetings_path,
+        }
+        self._default_tenant = Tenant(
+            TenantSettings.fromDict({"name": "default", **defaults}),
+            self._settings_path,
+            self._photo_history,
         )
+        tenants = {"default": self._default_tenant}
+        self._tenants_by_host = {}
+        for tenant_dict in tenants_list:
+            settings = TenantSettings.fromDict({**defaults, **tenant_dict})
+            if settings.name in tenants:
+                raise ValueError(f"Duplicate tenant {settings.name}")
 
-        logging.info("Loading greetings")
-        with open(self._settings.greetings_path, "r") as f:
-            greetings_list = toml.load(f)
+            tenant = Tenant(settings, self._settings_path, self._photo_history)
+            tenants[tenant.name] = tenant
+            for host in tenant.hosts:
+                self._tenants_by_host[host.lower()] = tenant
 
-        greetings = [
-            Greeting.fromDict(greeting) for greeting in greetings_list["Greetings"]
-        ]
+        logging.info(f"Loaded {len(tenants)} tenants")
+        return tenants
+
+    def _getTenant(self, request: Request) -> Tenant:
+        """Get the tenant of a request, by path prefix or by host.
+
+        Args:
+            request (Request): HTTP request
+
+        Returns:
+            Tenant
+        """
+        name = request.scope.get("state", {}).get("tenant")
+        if name is not None:
+            return self._tenants[name]
+
+        host = request.headers.get("host", "").rsplit(":", 1)[0].lower()
+        return self._tenants_by_host.get(host, self._default_tenant)
+
+    def _reloadLinks(self) -> None:
+        """Reload the links of the tenants whose links file has been modified."""
+        for tenant in self._tenants.values():
+            tenant.reloadLinks()
+
+    async def warmUp(self) -> None:
+        """Warm up the weather, the photo, the news and the links status caches."""
+        tasks = []
+        for tenant in self._tenants.values():
+            tasks.extend(
+                (
+                    tenant.weather.getWeather(),
+                    tenant.unsplash.getRandomPhoto(),
+                    tenant.news.getNews(),
+                    tenant.link_checker.checkLinks(),
+                )
+            )
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logging.warning(f"Cannot warm up cache: {result}")
+
+    async def exportAsync(self) -> None:
+        """Run the server as a refresher of a static export of the homepages.
+
+        The pages and the data they request are written periodically into
+        the output directory, to be served by another web server; no request
+        is served by this process.
+        """
+        self._export_settings = self._loadOptionalSettings(ExportSettings, "Export")
+        self._exporter = Exporter(self._export_settings.output_dir)
+        self.addScheduleInterval(
+            self._export_settings.interval,
+            self._export,
+            run_now=True,
+        )
+        await self.runAsync()
 
-        return links, greetings
+    def _getExportDir(self, tenant: Tenant) -> str:
+        """Get the directory of a tenant, relative to the output directory.
+
+        The default tenant is exported in the output directory itself,
+        the tenants with a path prefix in the prefix directory and
+        the others in a directory named after them.
+
+        Args:
+            tenant (Tenant): the tenant
+
+        Returns:
+            str
+        """
+        if tenant.path_prefix:
+            return tenant.path_prefix.strip("/")
+        if tenant is self._default_tenant:
+            return ""
+        return tenant.name
+
+    def _makeExportRequest(self, tenant: Tenant, prefix: str) -> Request:
+        """Make the request the exported pages of a tenant are rendered for.
+
+        The pages of a tenant selected by host are rendered for its first
+        host, as its directory is served as the root of that host.
+
+        Args:
+            tenant (Tenant): the tenant
+            prefix (str): path prefix of the homepage
+
+        Returns:
+            Request
+        """
+        url = urlsplit(self._export_settings.base_url)
+        if not tenant.path_prefix and tenant.hosts:
+            host = tenant.hosts[0]
+            url = url._replace(netloc=f"{host}:{url.port}" if url.port else host)
+        default_port = 443 if url.scheme == "https" else 80
+        return Request(
+            {
+                "type": "http",
+                "app": self._fastapi_app,
+                "method": "GET",
+                "scheme": url.scheme,
+                "server": (url.hostname, url.port or default_port),
+                "path": f"{prefix}/",
+                "root_path": prefix,
+                "query_string": b"",
+                "headers": [(b"host", url.netloc.encode())],
+            }
+        )
+
+    async def _exportTenant(self, tenant: Tenant, system: bytes | None) -> None:
+        """Export the pages, the static files and the data of a tenant.
+
+        The static files are exported in the directory of each tenant, as
+        they are served under the path prefix, where the service worker
+        of the homepage looks for them.
+
+        Args:
+            tenant (Tenant): the tenant
+            system (bytes | None): the latest system stats, None if disabled
+        """
+        directory = self._getExportDir(tenant)
+        prefix = f"/{directory}" if tenant.path_prefix else ""
+        self._exporter.copyTree("static", os.path.join(directory, "static"))
+        self._exporter.copy("static/js/sw.js", os.path.join(directory, "sw.js"))
+        request = self._makeExportRequest(tenant, prefix)
+
+        # a page for each network zone, picked by the web server
+        for zone, local in (("local", True), ("remote", False)):
+            page = self._renderIndexPage(request, tenant, local, prefix)
+            self._exporter.write(os.path.join(directory, f"index.{zone}.html"), page)
+
+        weather, photo, news = await asyncio.gather(
+            tenant.weather.getWeather(),
+            tenant.unsplash.getRandomPhoto(),
+            tenant.news.getNews(),
+            return_exceptions=True,
+        )
+        data = {
+            "weather": weather,
+            "image": photo,
+            "news": news,
+        }
+        for name, result in data.items():
+            if isinstance(result, Exception):
+                # keep the last exported data
+                logging.warning(f"Cannot export {name} of {tenant.name}: {result}")
+                continue
+
+            if isinstance(result, list):
+                content = [item.toResponse().model_dump() for item in result]
+            else:
+                content = result.toResponse().model_dump()
+            self._exporter.write(
+                os.path.join(directory, "get", name),
+                json.dumps(content).encode(),
+            )
+
+        if system is not None:
+            self._exporter.write(os.path.join(directory, "get", "system"), system)
+
+    async def _export(self) -> None:
+        """Export the homepages of the tenants."""
+        logging.info("Exporting homepages")
+        # the page only shows the latest sample
+        system = None
+        if self._system_stats is not None:
+            system = self._system_stats.toResponse(1).model_dump_json().encode()
+
+        for tenant in self._tenants.values():
+            await self._exportTenant(tenant, system)
+
+        logging.info("Exported homepages")
 
     def _isLocalIp(self, ip: str) -> bool:
         """Check if the ip is local.
@@ -95,21 +393,12 @@ class RPiServer(Server):
         """
         return ip.startswith("192.168.1") or ip.startswith("127.0.0")
 
-    def _getGreeting(self) -> Greeting:
-        """Get a greeting.
-
-        Returns:
-            Greeting
-        """
-        logging.info("Getting a greeting")
-        hour = datetime.now().hour
-        for greeting in self._greetings:
-            if greeting.isInTime(hour):
-                return greeting
-
     async def _indexPage(self, request: Request) -> HTMLResponse:
         """Serve the index page.
 
+        The page is rendered once for each tenant, greeting, base url and
+        kind of client (local or remote), then served from memory.
+
         Args:
             request (Request): HTTP request
 
@@ -121,17 +410,64 @@ class RPiServer(Server):
         local = self._isLocalIp(ip)
         logging.info(f"Client ip: {ip}. Local: {local}")
 
-        # format the links according to the request
-        # (either local or remote)
-        links = [link.getPropertiesDict(local) for link in self._links]
+        tenant = self._getTenant(request)
+        prefix = request.scope.get("root_path", "")
+        # ask the browser for the viewport size, used by the image api
+        return HTMLResponse(
+            content=self._renderIndexPage(request, tenant, local, prefix),
+            headers={"Accept-CH": self._CLIENT_HINTS},
+        )
+
+    def _renderIndexPage(
+        self, request: Request, tenant: Tenant, local: bool, prefix: str
+    ) -> bytes:
+        """Render the index page, or get it from the cache of the tenant.
+
+        Args:
+            request (Request): HTTP request
+            tenant (Tenant): the tenant of the page
+            local (bool): whether the page is for a local client
+            prefix (str): path prefix of the requests made by the page
+
+        Returns:
+            bytes
+        """
         # get a greeting
-        greeting = self._getGreeting()
-        # return the page
-        return self.generateTemplateResponse(
-            request=request,
-            template="index.html",
-            links=links,
-            greeting=greeting,
+        greeting = tenant.getGreeting()
+
+        def render() -> bytes:
+            # format the links according to the request
+            # (either local or remote)
+            links = [link.getPropertiesDict(local) for link in tenant.links]
+            return self.generateTemplateResponse(
+                request=request,
+                template="index.html",
+                links=links,
+                greeting=greeting,
+                prefix=prefix,
+            ).body
+
+        message = greeting.message if greeting is not None else None
+        key = (local, message, str(request.base_url), prefix)
+        return tenant.getPage(key, render)
+
+    async def _serviceWorker(self, request: Request) -> FileResponse:
+        """Serve the service worker.
+
+        The file is stored among the static files, but it must be served
+        from the root to control the whole page.
+
+        Args:
+            request (Request): HTTP request
+
+        Returns:
+            FileResponse
+        """
+        logging.info("Serving service worker")
+        return FileResponse(
+            "static/js/sw.js",
+            media_type="text/javascript",
+            headers={"Cache-Control": "no-cache", "Service-Worker-Allowed": "/"},
         )
 
     async def _errorPage(
@@ -139,7 +475,9 @@ class RPiServer(Server):
     ) -> HTMLResponse:
         """Handle an HTTPException.
 
-        If the error is a 404, redirect to the index page.
+        If the error is a 404, redirect to the index page of the tenant.
+        Most of the 404s come from scanners, so they are only counted and
+        answered with the pre-rendered redirect page of the tenant.
 
         Args:
             request (Request): HTTP request
@@ -148,17 +486,13 @@ class RPiServer(Server):
         Returns:
             HTMLResponse
         """
-        logging.warning(f"Handling HTTPException: {exception}")
-
-        is_api_request = request.url.path.startswith("/get")
-        error_code = exception.status_code
+        if exception.status_code == 404:
+            self._rate_limiter.not_found += 1
+        else:
+            logging.warning(f"Handling HTTPException: {exception}")
 
-        logging.info(f"Is API request: {is_api_request}, Error code: {error_code}")
-
-        return self.generateTemplateResponse(
-            request=request,
-            template="redirect.html",
-        )
+        tenant = self._getTenant(request)
+        return HTMLResponse(content=self._redirect_pages[tenant.name])
 
     async def _weatherApi(self, request: Request) -> WeatherResponse:
         """Serve the weather api.
@@ -173,14 +507,59 @@ class RPiServer(Server):
         ip = request.client.host
         local = self._isLocalIp(ip)
         logging.info(f"Client ip: {ip}. Local: {local}")
-        w = await self._weather.getWeather()
+        w = await self._getTenant(request).weather.getWeather()
         return w.toResponse()
 
-    async def _unsplashApi(self, request: Request) -> UnsplashResponse:
+    def _getViewport(
+        self, request: Request, w: int | None, dpr: float | None
+    ) -> tuple[int | None, float]:
+        """Get the viewport of the client.
+
+        The query parameters take precedence over the client hints.
+
+        Args:
+            request (Request): HTTP request
+            w (int | None): viewport width query parameter
+            dpr (float | None): device pixel ratio query parameter
+
+        Returns:
+            tuple[int | None, float]: viewport width (None if unknown)
+                and device pixel ratio
+        """
+        headers = request.headers
+        if w is None:
+            w = headers.get("Sec-CH-Viewport-Width") or headers.get("Viewport-Width")
+        if dpr is None:
+            dpr = headers.get("Sec-CH-DPR") or headers.get("DPR") or 1
+
+        try:
+            width = int(float(w)) if w is not None else None
+            dpr = float(dpr)
+        except ValueError:
+            return None, 1
+
+        if width is not None and not 0 < width <= 16384:
+            width = None
+
+        return width, min(max(dpr, 0.5), 4)
+
+    async def _unsplashApi(
+        self,
+        request: Request,
+        response: Response,
+        w: int | None = None,
+        dpr: float | None = None,
+    ) -> UnsplashResponse:
         """Serve the unsplash api.
 
+        The size of the photo is picked according to the viewport of the
+        client, sent either as client hints or as query parameters.
+
         Args:
             request (Request): HTTP request
+            response (Response): HTTP response
+            w (int, optional): viewport width, in css pixels. Defaults to None.
+            dpr (float, optional): device pixel ratio. Defaults to None.
 
         Returns:
             UnsplashResponse: Unsplash response
@@ -189,6 +568,150 @@ class RPiServer(Server):
         ip = request.client.host
         local = self._isLocalIp(ip)
         logging.info(f"Client ip: {ip}. Local: {local}")
-        u = await self._unsplash.getRandomPhoto()
+        unsplash = self._getTenant(request).unsplash
+        u = await unsplash.getRandomPhoto()
         logging.info(f"Unsplash response: {u}")
-        return u.toResponse()
+
+        response.headers["Vary"] = self._CLIENT_HINTS
+        viewport_width, dpr = self._getViewport(request, w, dpr)
+        if viewport_width is None:
+            return u.toResponse()
+
+        width = unsplash.getPhotoWidth(viewport_width, dpr)
+        logging.info(f"Viewport width: {viewport_width}, dpr: {dpr}, width: {width}")
+        return u.toResponse(width, unsplash.quality)
+
+    async def _photoHistoryApi(
+        self,
+        request: Request,
+        limit: int = 20,
+        cursor: int | None = None,
+        query: str | None = None,
+        photographer: str | None = None,
+        before: float | None = None,
+    ) -> PhotoHistoryResponse:
+        """Serve the photo history api.
+
+        Args:
+            request (Request): HTTP request
+            limit (int, optional): maximum number of photos. Defaults to 20.
+            cursor (int, optional): next_cursor of the previous page.
+                Defaults to None.
+            query (str, optional): only get the photos of a query.
+                Defaults to None.
+            photographer (str, optional): only get the photos of a
+                photographer. Defaults to None.
+            before (float, optional): only get the photos served before a
+                timestamp. Defaults to None.
+
+        Returns:
+            PhotoHistoryResponse: Page of photos, newest first
+        """
+        logging.info("Serving photo history api")
+        if self._photo_history is None:
+            raise HTTPException(status_code=404)
+
+        return await self._photo_history.getPage(
+            tenant=self._getTenant(request).name,
+            limit=max(1, min(limit, 100)),
+            cursor=cursor,
+            query=query,
+            photographer=photographer,
+            before=before,
+        )
+
+    async def _newsApi(
+        self, request: Request, limit: int = 10
+    ) -> list[NewsItemResponse]:
+        """Serve the news api.
+
+        Args:
+            request (Request): HTTP request
+            limit (int, optional): maximum number of items. Defaults to 10.
+
+        Returns:
+            list[NewsItemResponse]: Latest items of the feeds, newest first
+        """
+        logging.info("Serving news api")
+        items = await self._getTenant(request).news.getNews()
+        return [i.toResponse() for i in items[: max(0, limit)]]
+
+    async def _linksStatusApi(self, request: Request) -> list[LinkStatusResponse]:
+        """Serve the links status api.
+
+        Args:
+            request (Request): HTTP request
+
+        Returns:
+            list[LinkStatusResponse]: Status of each link
+        """
+        logging.info("Serving links status api")
+        link_checker = self._getTenant(request).link_checker
+        return [s.toResponse() for s in link_checker.getStatuses()]
+
+    async def _linksApi(
+        self,
+        request: Request,
+        q: str = "",
+        limit: int = 10,
+    ) -> list[LinkSearchResponse]:
+        """Serve the links search api.
+
+        Args:
+            request (Request): HTTP request
+            q (str, optional): search query. Defaults to "".
+            limit (int, optional): maximum number of results. Defaults to 10.
+
+        Returns:
+            list[LinkSearchResponse]: Matching links, best matches first
+        """
+        logging.info(f"Serving links api, query: {q}")
+        local = self._isLocalIp(request.client.host)
+        link_index = self._getTenant(request).link_index
+        matches = link_index.search(q, max(0, min(limit, 100)))
+        return [m.toResponse(local) for m in matches]
+
+    async def _rateLimitApi(self, request: Request) -> RateLimitStatsResponse:
+        """Serve the rate limit stats api.
+
+        Args:
+            request (Request): HTTP request
+
+        Returns:
+            RateLimitStatsResponse: Requests allowed and shed
+        """
+        logging.info("Serving rate limit api")
+        return self._rate_limiter.toResponse()
+
+    async def _servicesApi(self, request: Request) -> list[ServiceStatsResponse]:
+        """Serve the cached services stats api.
+
+        Args:
+            request (Request): HTTP request
+
+        Returns:
+            list[ServiceStatsResponse]: Cache and latency stats of each service
+        """
+        logging.info("Serving services api")
+        tenant = self._getTenant(request)
+        return [
+            tenant.weather.getStats(),
+            tenant.unsplash.getStats(),
+            tenant.news.getStats(),
+        ]
+
+    async def _systemApi(
+        self, request: Request, limit: int | None = None
+    ) -> SystemStatsResponse:
+        """Serve the system stats api.
+
+        Args:
+            request (Request): HTTP request
+            limit (int, optional): maximum number of samples. Defaults to None,
+                meaning all the stored samples.
+
+        Returns:
+            SystemStatsResponse: Latest samples of the system stats, newest last
+        """
+        logging.info("Serving system api")
+        return self._system_stats.toResponse(limit)
@@ -4,6 +4,11 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
+import signal
+import socket
+import sys
+from datetime import datetime
 from typing import Callable
 
 import uvicorn
@@ -11,12 +16,15 @@ from apscheduler.job import Job
 from apscheduler.schedulers.asyncio import AsyncIOScheduler as Scheduler
 from fastapi import APIRouter, FastAPI
 from fastapi import Request as FastAPIRequest
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import Response as FastAPIResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from modules.settings import ServerSettings
+from modules.compression import CompressionMiddleware
+from modules.loopmonitor import LoopLagResponse, LoopMonitor
+from modules.settings import LoopMonitorSettings, ServerSettings
 
 
 class Request(FastAPIRequest):
@@ -31,6 +39,14 @@ class HTMLResponse(HTMLResponse):
     """Mask for HTMLResponse class."""
 
 
+class FileResponse(FileResponse):
+    """Mask for FileResponse class."""
+
+
+class Response(FastAPIResponse):
+    """Mask for FastAPIResponse class."""
+
+
 class Server:
     """The Server class.
 
@@ -44,6 +60,7 @@ class Server:
     _settings: ServerSettings
     _settings_path: str
     _schedules: dict[Callable, Job]
+    _loop_monitor: LoopMonitor
 
     def __init__(self) -> Server:
         """Instantiate a new Server object.
@@ -86,21 +103,106 @@ class Server:
             port=port,
             loop="asyncio",
             log_config=logging_config,
+            timeout_graceful_shutdown=self._settings.graceful_shutdown_timeout,
         )
         return uvicorn.Server(config=config)
 
-    def addScheduleInterval(self, interval: float, method: Callable) -> None:
+    def _bindSocket(self, port: int) -> socket.socket:
+        """Bind the listening socket.
+
+        The socket is bound with SO_REUSEPORT, so that a new process can bind
+        the same port while the old one is still serving.
+
+        Args:
+            port (int): The port to bind.
+
+        Returns:
+            socket.socket: The bound socket.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("0.0.0.0", port))
+        sock.set_inheritable(True)
+        return sock
+
+    def _readPidFile(self) -> int | None:
+        """Read the pid of the running server from the pid file.
+
+        Returns:
+            int | None: The pid, None if no other server is running.
+        """
+        try:
+            with open(self._settings.pid_file, "r") as f:
+                pid = int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if pid == os.getpid():
+            return None
+
+        # make sure that the pid still belongs to a server process
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except FileNotFoundError:
+            return None
+
+        script = os.path.basename(sys.argv[0]).encode()
+        if script not in cmdline:
+            logging.warning(f"Pid {pid} does not belong to a server process")
+            return None
+
+        return pid
+
+    def _writePidFile(self) -> None:
+        """Write the pid of this process to the pid file."""
+        with open(self._settings.pid_file, "w") as f:
+            f.write(str(os.getpid()))
+
+    def _removePidFile(self) -> None:
+        """Remove the pid file, if it belongs to this process."""
+        if self._readPidFile() is None:
+            try:
+                os.remove(self._settings.pid_file)
+            except FileNotFoundError:
+                pass
+
+    def _cleanUp(self) -> None:
+        """Stop the scheduler and remove the pid file."""
+        logging.info("Cleaning up")
+        if self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+        self._removePidFile()
+
+    async def warmUp(self) -> None:
+        """Warm up the caches before serving the requests.
+
+        Called before taking over from the old process when restarting.
+        Meant to be overridden by the subclasses.
+        """
+
+    def addScheduleInterval(
+        self,
+        interval: float,
+        method: Callable,
+        run_now: bool = False,
+    ) -> None:
         """Add a schedule interval.
 
         Args:
             interval (float): The interval in seconds.
             method (Callable): The method to call.
+            run_now (bool, optional): Whether to also call the method as soon
+                as the scheduler starts. Defaults to False.
         """
         logging.info(f"Adding schedule interval {interval} {method}")
+        kwargs = {"next_run_time": datetime.now()} if run_now else {}
         self._schedules[method] = self._scheduler.add_job(
             method,
             "interval",
             seconds=interval,
+            **kwargs,
         )
         logging.info("Added schedule interval")
 
@@ -115,6 +217,26 @@ class Server:
         del self._schedules[method]
         logging.info("Removed schedule")
 
+    def addStartupHook(self, f: Callable) -> None:
+        """Add a function to be called when the server starts.
+
+        Args:
+            f (function): The function to execute.
+        """
+        logging.info(f"Adding startup hook {f}")
+        self._fastapi_app.add_event_handler("startup", f)
+        logging.info("Added startup hook")
+
+    def addShutdownHook(self, f: Callable) -> None:
+        """Add a function to be called when the server shuts down.
+
+        Args:
+            f (function): The function to execute.
+        """
+        logging.info(f"Adding shutdown hook {f}")
+        self._fastapi_app.add_event_handler("shutdown", f)
+        logging.info("Added shutdown hook")
+
     def addRoute(
         self,
         path: str,
@@ -159,6 +281,65 @@ class Server:
         )
         logging.info("Added static route")
 
+    def addMiddleware(self, middleware: type, **kwargs) -> None:
+        """Add an ASGI middleware to the server.
+
+        Args:
+            middleware (type): The middleware class.
+            **kwargs: The middleware arguments.
+        """
+        logging.info(f"Adding middleware {middleware.__name__} {kwargs}")
+        self._fastapi_app.add_middleware(middleware, **kwargs)
+        logging.info("Added middleware")
+
+    def addCompression(self, min_size: int = 512, cache_size: int = 64) -> None:
+        """Add compression of the HTML and JSON responses.
+
+        Each distinct response body is compressed once per encoding
+        (brotli if installed, gzip otherwise) and then served from memory.
+
+        Args:
+            min_size (int, optional): Minimum size of the body to compress,
+                in bytes. Defaults to 512.
+            cache_size (int, optional): Maximum number of cached bodies.
+                Defaults to 64.
+        """
+        logging.info(f"Adding compression {min_size} {cache_size}")
+        self._fastapi_app.add_middleware(
+            CompressionMiddleware,
+            min_size=min_size,
+            cache_size=cache_size,
+        )
+        logging.info("Added compression")
+
+    def addLoopMonitor(
+        self, settings: LoopMonitorSettings, path: str = "/get/loop"
+    ) -> None:
+        """Add a monitor of the event loop lag and of the blocking calls.
+
+        Args:
+            settings (LoopMonitorSettings): The settings of the monitor.
+            path (str, optional): The path of the route serving the stats.
+                Defaults to "/get/loop".
+        """
+        logging.info(f"Adding loop monitor {settings}")
+        self._loop_monitor = LoopMonitor(settings)
+        self.addStartupHook(self._loop_monitor.start)
+        self.addShutdownHook(self._loop_monitor.stop)
+        self.addRoute(path, self._loopMonitorApi)
+        logging.info("Added loop monitor")
+
+    async def _loopMonitorApi(self, request: Request) -> LoopLagResponse:
+        """Serve the loop monitor stats.
+
+        Args:
+            request (Request): HTTP request
+
+        Returns:
+            LoopLagResponse: Event loop lag and blocking calls
+        """
+        return self._loop_monitor.toResponse()
+
     def addHTTPExceptionRoute(self, f: Callable) -> None:
         """Add an error route to the server.
 
@@ -204,9 +385,17 @@ class Server:
             },
         )
 
-    async def startAsync(self) -> None:
+    async def startAsync(self, restart: bool = False) -> None:
         """Start the server.
 
+        In restart mode, the server binds the port alongside the running one,
+        warms up its caches, starts serving and only then asks the old
+        process to drain its connections and exit.
+
+        Args:
+            restart (bool, optional): Whether to take over from an already
+                running server. Defaults to False.
+
         Returns:
             Server: The instance of the running server
 
@@ -221,14 +410,80 @@ class Server:
             port=port,
             logging_config=self._settings.logging_config,
         )
-
+        if not restart:
+            running_pid = self._readPidFile()
+            if running_pid is not None:
+                # the port is bound with SO_REUSEPORT, so binding would not fail
+                logging.error(
+                    f"A server is already running with pid {running_pid}, "
+                    "use --restart to take over"
+                )
+                sys.exit(1)
+
+        sock = self._bindSocket(port)
+
+        old_pid = None
+        if restart:
+            old_pid = self._readPidFile()
+            logging.info(f"Restarting, old server pid: {old_pid}")
+            logging.info("Warming up")
+            await self.warmUp()
+            logging.info("Warmed up")
+
+        # uvicorn re-raises the termination signals once it has stopped,
+        # so the cleanup must happen during the application shutdown
+        self.addShutdownHook(self._cleanUp)
         self._scheduler.start()
-        await server.serve()
+        serve_task = asyncio.create_task(server.serve(sockets=[sock]))
+        try:
+            # wait for the server to accept connections before taking over
+            while not server.started and not serve_task.done():
+                await asyncio.sleep(0.05)
+
+            if server.started:
+                self._writePidFile()
+                if old_pid is not None:
+                    logging.info(f"Stopping old server with pid {old_pid}")
+                    try:
+                        os.kill(old_pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        logging.warning("Old server already stopped")
+
+            await serve_task
+        finally:
+            sock.close()
+
         logging.info("Server stopped")
 
-    def start(self) -> None:
-        """Start the server synchronously."""
-        asyncio.run(self.startAsync())
+    async def runAsync(self) -> None:
+        """Run the startup hooks and the scheduled jobs, without serving.
+
+        Runs until interrupted, then runs the shutdown hooks.
+        """
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopped.set)
+
+        logging.info("Running without serving")
+        await self._fastapi_app.router.startup()
+        self._scheduler.start()
+        try:
+            await stopped.wait()
+        finally:
+            self._scheduler.shutdown(wait=False)
+            await self._fastapi_app.router.shutdown()
+
+        logging.info("Stopped running")
+
+    def start(self, restart: bool = False) -> None:
+        """Start the server synchronously.
+
+        Args:
+            restart (bool, optional): Whether to take over from an already
+                running server. Defaults to False.
+        """
+        asyncio.run(self.startAsync(restart))
 
     @property
     def app(self) -> FastAPI:
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import toml
 
@@ -55,6 +55,9 @@ class ServerSettings(Settings):
     links_path: str
     greetings_path: str
     logging_config: str
+    links_reload_interval: int = 60
+    graceful_shutdown_timeout: int = 10
+    pid_file: str = "rpi-homepage.pid"
 
 
 @dataclass
@@ -65,6 +68,16 @@ class WeatherSettings(Settings):
     city: str
     language: str
     cache_duration: int
+    forecast_cache_duration: int = 1800
+    air_quality_cache_duration: int = 900
+    forecast_length: int = 8
+    request_timeout: float = 5
+    endpoints: list[str] = field(
+        default_factory=lambda: ["weather", "forecast", "air_pollution"]
+    )
+    latitude: float | None = None
+    longitude: float | None = None
+    refresh_interval: int = 0
 
 
 @dataclass
@@ -74,3 +87,96 @@ class UnsplashSettings(Settings):
     api_key: str
     query: list[str]
     cache_duration: int
+    size_buckets: list[int] = field(
+        default_factory=lambda: [640, 1080, 1600, 1920, 2560, 3840]
+    )
+    quality: int = 75
+    refresh_interval: int = 0
+
+
+@dataclass
+class NewsSettings(Settings):
+    """Settings for the news module."""
+
+    feeds: list[str] = field(default_factory=list)
+    cache_duration: int = 900
+    max_items: int = 30
+    request_timeout: float = 10
+    refresh_interval: int = 0
+
+
+@dataclass
+class LinkCheckerSettings(Settings):
+    """Settings for the link checker module."""
+
+    check_interval: int = 60
+    timeout: float = 2
+    max_concurrency: int = 32
+
+
+@dataclass
+class TenantSettings(Settings):
+    """Settings for a tenant of the server."""
+
+    name: str
+    links_path: str
+    greetings_path: str
+    hosts: list[str] = field(default_factory=list)
+    path_prefix: str | None = None
+    city: str | None = None
+    language: str | None = None
+    query: list[str] | None = None
+    feeds: list[str] | None = None
+
+
+@dataclass
+class RateLimiterSettings(Settings):
+    """Settings for the rate limiter module."""
+
+    max_clients: int = 4096
+    image_rate: float = 0.2
+    image_burst: float = 10
+    api_rate: float = 2
+    api_burst: float = 30
+    page_rate: float = 1
+    page_burst: float = 20
+
+
+@dataclass
+class LoopMonitorSettings(Settings):
+    """Settings for the loop monitor module."""
+
+    enabled: bool = False
+    interval: float = 0.05
+    blocking_threshold: float = 0.1
+    recent_samples: int = 1200
+    max_blocking_calls: int = 20
+
+
+@dataclass
+class PhotoHistorySettings(Settings):
+    """Settings for the photo history module."""
+
+    enabled: bool = True
+    path: str = "photos.sqlite3"
+    max_photos: int = 50000
+
+
+@dataclass
+class SystemStatsSettings(Settings):
+    """Settings for the system stats module."""
+
+    enabled: bool = True
+    interval: float = 5
+    samples: int = 720
+    thermal_zone: str = "/sys/class/thermal/thermal_zone0/temp"
+    network_interface: str | None = None
+
+
+@dataclass
+class ExportSettings(Settings):
+    """Settings for the static export mode."""
+
+    output_dir: str = "export"
+    interval: int = 30
+    base_url: str = "http://localhost/"
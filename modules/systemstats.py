@@ -0,0 +1,301 @@
+"""Module for the SystemStats class, used to sample the stats of the system."""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+import time
+from array import array
+
+from pydantic import BaseModel
+
+from modules.settings import SystemStatsSettings
+
+
+class SystemSampleResponse(BaseModel):
+    """SystemSampleResponse class, used to represent a sample of the system stats."""
+
+    time: float
+    load: list[float | None]
+    cpu: float | None
+    cores: list[float | None]
+    memory_used: float | None
+    memory_total: float | None
+    temperature: float | None
+    rx_rate: float | None
+    tx_rate: float | None
+
+
+class SystemStatsResponse(BaseModel):
+    """SystemStatsResponse class, used to represent the system stats."""
+
+    interval: float
+    samples: list[SystemSampleResponse]
+
+
+class SystemStats:
+    """SystemStats class, used to sample the stats of the system.
+
+    The stats are read from /proc and /sys through files kept open, read
+    again from the start into the same buffer at each sample, and parsed in
+    place with precompiled patterns, without copying or splitting the buffer.
+    The samples are written into a preallocated ring buffer of floats, so
+    the memory used is fixed whatever the number of samples.
+    """
+
+    # fields of a sample before the usage of each core, in the ring buffer
+    _FIELDS = (
+        "time",
+        "load_1",
+        "load_5",
+        "load_15",
+        "cpu",
+        "memory_used",
+        "memory_total",
+        "temperature",
+        "rx_rate",
+        "tx_rate",
+    )
+
+    # the first 8 times of the cpu lines of /proc/stat
+    _CPU_PATTERN = re.compile(
+        rb"^cpu\d* +(\d+) (\d+) (\d+) (\d+) (\d+) (\d+) (\d+)(?: (\d+))?",
+        re.MULTILINE,
+    )
+    _LOAD_PATTERN = re.compile(rb"([\d.]+) ([\d.]+) ([\d.]+)")
+    _MEMORY_TOTAL_PATTERN = re.compile(rb"^MemTotal: +(\d+)", re.MULTILINE)
+    _MEMORY_AVAILABLE_PATTERN = re.compile(rb"^MemAvailable: +(\d+)", re.MULTILINE)
+    _NUMBER_PATTERN = re.compile(rb"-?\d+")
+    # the interface, received and transmitted bytes of /proc/net/dev
+    _NETWORK_PATTERN = re.compile(
+        rb"^ *([^\s:]+): *(\d+)(?: +\d+){7} +(\d+)", re.MULTILINE
+    )
+
+    _settings: SystemStatsSettings
+    _files: dict[str, int]
+    _buffer: bytearray
+    _cores: int
+    _width: int
+    _ring: array
+    _count: int
+    _previous_cpu: list[tuple[int, int]]
+    _previous_net: tuple[float, int, int] | None
+
+    def __init__(self, settings: SystemStatsSettings) -> SystemStats:
+        """Create a SystemStats object.
+
+        Args:
+            settings (SystemStatsSettings): the settings of the stats
+
+        Returns:
+            SystemStats
+        """
+        logging.info("Initializing SystemStats")
+        self._settings = settings
+        self._buffer = bytearray(4096)
+        self._files = {}
+        paths = {
+            "stat": "/proc/stat",
+            "loadavg": "/proc/loadavg",
+            "meminfo": "/proc/meminfo",
+            "net": "/proc/net/dev",
+            "temperature": settings.thermal_zone,
+        }
+        for name, path in paths.items():
+            try:
+                self._files[name] = os.open(path, os.O_RDONLY)
+            except OSError as e:
+                logging.warning(f"Cannot open {path}, not sampling it: {e}")
+
+        self._previous_cpu = []
+        self._previous_net = None
+        self._cores = max(0, len(self._readCpu()) - 1)
+        self._width = len(self._FIELDS) + self._cores
+        self._ring = array("d", bytes(8 * self._width * settings.samples))
+        self._count = 0
+
+    def _read(self, name: str) -> int | None:
+        """Read a file from the start into the shared buffer.
+
+        Args:
+            name (str): the name of the file
+
+        Returns:
+            int | None: the size of the content, None if the file is not open
+        """
+        fd = self._files.get(name)
+        if fd is None:
+            return None
+
+        while True:
+            size = os.preadv(fd, [self._buffer], 0)
+            if size < len(self._buffer):
+                return size
+            # the file did not fit, grow the buffer once and for all
+            self._buffer = bytearray(len(self._buffer) * 2)
+
+    def _readCpu(self) -> list[float]:
+        """Read the usage of the cpu and of each core since the last sample.
+
+        Returns:
+            list[float]: the usage of the cpu followed by the usage of
+                each core, in percent; nan when unknown, as on the first read
+        """
+        size = self._read("stat")
+        if size is None:
+            return []
+
+        usages = []
+        times = []
+        for i, match in enumerate(self._CPU_PATTERN.finditer(self._buffer, 0, size)):
+            user, nice, system, idle, iowait, irq, softirq, steal = map(
+                int, match.groups(b"0")
+            )
+            idle += iowait
+            total = user + nice + system + idle + irq + softirq + steal
+            times.append((idle, total))
+            if i < len(self._previous_cpu):
+                previous_idle, previous_total = self._previous_cpu[i]
+                elapsed = total - previous_total
+                busy = elapsed - (idle - previous_idle)
+                usages.append(100 * busy / elapsed if elapsed > 0 else math.nan)
+            else:
+                usages.append(math.nan)
+
+        self._previous_cpu = times
+        return usages
+
+    def _readLoad(self) -> tuple[float, float, float]:
+        """Read the load average over 1, 5 and 15 minutes."""
+        size = self._read("loadavg")
+        match = size and self._LOAD_PATTERN.match(self._buffer, 0, size)
+        if not match:
+            return math.nan, math.nan, math.nan
+        return float(match[1]), float(match[2]), float(match[3])
+
+    def _readMemory(self) -> tuple[float, float]:
+        """Read the used and the total memory, in MB."""
+        size = self._read("meminfo")
+        if size is None:
+            return math.nan, math.nan
+
+        total = self._MEMORY_TOTAL_PATTERN.search(self._buffer, 0, size)
+        available = self._MEMORY_AVAILABLE_PATTERN.search(self._buffer, 0, size)
+        if total is None or available is None:
+            return math.nan, math.nan
+
+        total = int(total[1]) / 1024
+        return total - int(available[1]) / 1024, total
+
+    def _readTemperature(self) -> float:
+        """Read the temperature of the cpu, in °C."""
+        size = self._read("temperature")
+        match = size and self._NUMBER_PATTERN.match(self._buffer, 0, size)
+        if not match:
+            return math.nan
+        return int(match[0]) / 1000
+
+    def _readNetwork(self, now: float) -> tuple[float, float]:
+        """Read the received and transmitted bytes per second since the last sample.
+
+        Args:
+            now (float): the time of the sample
+
+        Returns:
+            tuple[float, float]: the rates, nan on the first read
+        """
+        size = self._read("net")
+        if size is None:
+            return math.nan, math.nan
+
+        interface = self._settings.network_interface
+        if interface is not None:
+            interface = interface.encode()
+        rx = tx = 0
+        for match in self._NETWORK_PATTERN.finditer(self._buffer, 0, size):
+            name = match[1]
+            if name == b"lo" or (interface is not None and name != interface):
+                continue
+            rx += int(match[2])
+            tx += int(match[3])
+
+        previous = self._previous_net
+        self._previous_net = (now, rx, tx)
+        if previous is None or now <= previous[0]:
+            return math.nan, math.nan
+
+        elapsed = now - previous[0]
+        return (rx - previous[1]) / elapsed, (tx - previous[2]) / elapsed
+
+    async def sample(self) -> None:
+        """Sample the stats of the system.
+
+        A coroutine, so that the scheduler runs it in the loop:
+        the sample is cheaper than handing it to a worker thread.
+        """
+        ring = self._ring
+        start = (self._count % self._settings.samples) * self._width
+
+        usages = self._readCpu()
+        ring[start] = time.time()
+        ring[start + 1], ring[start + 2], ring[start + 3] = self._readLoad()
+        ring[start + 4] = usages[0] if usages else math.nan
+        ring[start + 5], ring[start + 6] = self._readMemory()
+        ring[start + 7] = self._readTemperature()
+        ring[start + 8], ring[start + 9] = self._readNetwork(time.monotonic())
+
+        cores_start = start + len(self._FIELDS)
+        for i in range(self._cores):
+            ring[cores_start + i] = usages[i + 1] if i + 1 < len(usages) else math.nan
+
+        self._count += 1
+
+    def close(self) -> None:
+        """Close the sampled files."""
+        logging.info("Closing SystemStats")
+        for fd in self._files.values():
+            os.close(fd)
+        self._files = {}
+
+    @staticmethod
+    def _optional(value: float) -> float | None:
+        """Convert a missing value, stored as nan, to None."""
+        return None if math.isnan(value) else value
+
+    def toResponse(self, limit: int | None = None) -> SystemStatsResponse:
+        """Convert the latest samples to a SystemStatsResponse object.
+
+        Args:
+            limit (int, optional): maximum number of samples, newest last.
+                Defaults to None, meaning all the stored samples.
+
+        Returns:
+            SystemStatsResponse
+        """
+        stored = min(self._count, self._settings.samples)
+        if limit is not None:
+            stored = min(stored, max(0, limit))
+
+        samples = []
+        for i in range(self._count - stored, self._count):
+            start = (i % self._settings.samples) * self._width
+            row = self._ring[start : start + self._width]
+            values = [self._optional(v) for v in row]
+            fields = dict(zip(self._FIELDS, values))
+            samples.append(
+                SystemSampleResponse(
+                    time=fields["time"],
+                    load=[fields["load_1"], fields["load_5"], fields["load_15"]],
+                    cpu=fields["cpu"],
+                    cores=values[len(self._FIELDS) :],
+                    memory_used=fields["memory_used"],
+                    memory_total=fields["memory_total"],
+                    temperature=fields["temperature"],
+                    rx_rate=fields["rx_rate"],
+                    tx_rate=fields["tx_rate"],
+                )
+            )
+
+        return SystemStatsResponse(interval=self._settings.interval, samples=samples)
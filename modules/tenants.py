@@ -0,0 +1,293 @@
+"""Module for the Tenant class, used to serve multiple homepages."""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime
+from typing import Callable
+
+import toml
+
+from modules.greetings import Greeting
+from modules.linkchecker import LinkChecker
+from modules.linkindex import LinkIndex
+from modules.links import Link
+from modules.news import NewsService
+from modules.photohistory import PhotoHistory
+from modules.settings import TenantSettings
+from modules.unsplash import UnsplashService
+from modules.weather import WeatherService
+
+
+class Tenant:
+    """Tenant class, used to represent a homepage served by the server.
+
+    Each tenant has its own links, greetings, weather, photos and news.
+    The rendered pages are cached and only rendered again when the links
+    or their status change.
+    """
+
+    # maximum number of cached pages
+    _MAX_PAGES = 64
+
+    _settings: TenantSettings
+    _links: list[Link]
+    _greetings: list[Greeting]
+    _links_mtime: float
+    _links_generation: int
+
+    _weather: WeatherService
+    _unsplash: UnsplashService
+    _news: NewsService
+    _link_checker: LinkChecker
+    _link_index: LinkIndex
+
+    _pages: dict[tuple, bytes]
+    _pages_generation: tuple[int, int]
+
+    def __init__(
+        self,
+        settings: TenantSettings,
+        settings_path: str = "settings/settings.toml",
+        history: PhotoHistory | None = None,
+    ) -> Tenant:
+        """Create a Tenant object.
+
+        Args:
+            settings (TenantSettings): settings of the tenant
+            settings_path (str, optional): Path to the settings file, holding
+                the settings of the services. Defaults to "settings/settings.toml".
+            history (PhotoHistory, optional): Store of the served photos.
+                Defaults to None.
+
+        Returns:
+            Tenant
+        """
+        logging.info(f"Initializing tenant {settings.name}")
+        self._settings = settings
+        self._links_generation = 0
+        self._pages = {}
+        self._pages_generation = None
+
+        self._links, self._greetings = self.loadAttributes()
+
+        weather_overrides = {
+            k: v
+            for k, v in (("city", settings.city), ("language", settings.language))
+            if v is not None
+        }
+        self._weather = WeatherService(settings_path, weather_overrides)
+
+        unsplash_overrides = {}
+        if settings.query is not None:
+            unsplash_overrides["query"] = settings.query
+        self._unsplash = UnsplashService(
+            settings_path, unsplash_overrides, history, settings.name
+        )
+
+        news_overrides = {}
+        if settings.feeds is not None:
+            news_overrides["feeds"] = settings.feeds
+        self._news = NewsService(settings_path, news_overrides)
+
+        self._link_checker = LinkChecker(self._links, settings_path)
+        self._link_index = LinkIndex(self._links)
+
+    def loadAttributes(self) -> tuple[list[Link], list[Greeting]]:
+        """Load the links and the greetings from their files."""
+        logging.info(f"Loading tenant {self.name} attributes")
+
+        links = self._loadLinks()
+
+        logging.info("Loading greetings")
+        with open(self._settings.greetings_path, "r") as f:
+            greetings_list = toml.load(f)
+
+        greetings = [
+            Greeting.fromDict(greeting) for greeting in greetings_list["Greetings"]
+        ]
+
+        return links, greetings
+
+    def _loadLinks(self) -> list[Link]:
+        """Load the links from the links file.
+
+        Returns:
+            list[Link]
+        """
+        logging.info("Loading links")
+        self._links_mtime = os.path.getmtime(self._settings.links_path)
+        with open(self._settings.links_path, "r") as f:
+            links_dict = toml.load(f)
+
+        self._links_generation += 1
+        return sorted(
+            [Link.fromDict(link) for link in links_dict["Links"]],
+            key=lambda link: len(link.display_name),
+            reverse=True,
+        )
+
+    def reloadLinks(self) -> None:
+        """Reload the links if the links file has been modified."""
+        try:
+            mtime = os.path.getmtime(self._settings.links_path)
+        except FileNotFoundError:
+            logging.error(f"Links file of tenant {self.name} not found")
+            return
+
+        if mtime == self._links_mtime:
+            return
+
+        logging.info(f"Links file of tenant {self.name} modified, reloading links")
+        try:
+            links = self._loadLinks()
+        except (KeyError, TypeError, toml.TomlDecodeError) as e:
+            logging.error(f"Cannot reload links: {e}")
+            return
+
+        self._links = links
+        self._link_checker.setLinks(links)
+        self._link_index.update(links)
+
+    def getGreeting(self) -> Greeting:
+        """Get a greeting.
+
+        Returns:
+            Greeting
+        """
+        hour = datetime.now().hour
+        for greeting in self._greetings:
+            if greeting.isInTime(hour):
+                return greeting
+
+    def getPage(self, key: tuple, render: Callable[[], bytes]) -> bytes:
+        """Get a rendered page, rendering it only if it is not cached.
+
+        The cache is emptied when the links or their status change.
+
+        Args:
+            key (tuple): the key of the page, including everything
+                the page depends on, other than the links
+            render (Callable[[], bytes]): function rendering the page
+
+        Returns:
+            bytes
+        """
+        generation = (self._links_generation, self._link_checker.generation)
+        if generation != self._pages_generation or len(self._pages) > self._MAX_PAGES:
+            self._pages = {}
+            self._pages_generation = generation
+
+        page = self._pages.get(key)
+        if page is None:
+            logging.info(f"Rendering page {key} of tenant {self.name}")
+            page = render()
+            self._pages[key] = page
+
+        return page
+
+    @property
+    def name(self) -> str:
+        """Get the name of the tenant."""
+        return self._settings.name
+
+    @property
+    def hosts(self) -> list[str]:
+        """Get the hosts of the tenant."""
+        return self._settings.hosts
+
+    @property
+    def path_prefix(self) -> str | None:
+        """Get the path prefix of the tenant."""
+        return self._settings.path_prefix
+
+    @property
+    def links(self) -> list[Link]:
+        """Get the links of the tenant."""
+        return self._links
+
+    @property
+    def weather(self) -> WeatherService:
+        """Get the weather service of the tenant."""
+        return self._weather
+
+    @property
+    def unsplash(self) -> UnsplashService:
+        """Get the unsplash service of the tenant."""
+        return self._unsplash
+
+    @property
+    def news(self) -> NewsService:
+        """Get the news service of the tenant."""
+        return self._news
+
+    @property
+    def link_checker(self) -> LinkChecker:
+        """Get the link checker of the tenant."""
+        return self._link_checker
+
+    @property
+    def link_index(self) -> LinkIndex:
+        """Get the link index of the tenant."""
+        return self._link_index
+
+
+class TenantPrefixMiddleware:
+    """TenantPrefixMiddleware class, an ASGI middleware routing path prefixes.
+
+    The requests whose path starts with the prefix of a tenant are routed as
+    if the prefix was the root of the app, and the tenant name is stored in
+    the request state.
+    """
+
+    def __init__(self, app: Callable, prefixes: dict[str, str]) -> None:
+        """Create a TenantPrefixMiddleware object.
+
+        Args:
+            app (Callable): the ASGI app to wrap
+            prefixes (dict[str, str]): tenant names, keyed by path prefix
+        """
+        self._app = app
+        self._prefixes = {p.rstrip("/"): name for p, name in prefixes.items()}
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """Handle an ASGI call.
+
+        Args:
+            scope (dict): the ASGI scope
+            receive (Callable): the ASGI receive channel
+            send (Callable): the ASGI send channel
+        """
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        path = scope["path"][len(root_path) :]
+        # the prefix is the first segment of the path
+        end = path.find("/", 1)
+        prefix = path if end == -1 else path[:end]
+        name = self._prefixes.get(prefix)
+        if name is None:
+            await self._app(scope, receive, send)
+            return
+
+        if end == -1:
+            # redirect to the trailing slash, so relative urls work
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 307,
+                    "headers": [(b"location", f"{scope['path']}/".encode())],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        scope = {
+            **scope,
+            "root_path": root_path + prefix,
+            "state": {**scope.get("state", {}), "tenant": name},
+        }
+        await self._app(scope, receive, send)
@@ -4,16 +4,17 @@ from __future__ import annotations
 
 import logging
 import random
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import aiohttp
-import toml
 from pydantic import BaseModel
 
+from modules.cachedservice import CachedService
 from modules.settings import UnsplashSettings
 
+if TYPE_CHECKING:
+    from modules.photohistory import PhotoHistory
+
 
 class UnsplashResponse(BaseModel):
     """UnsplashResponse class, used to represent a unsplash response."""
@@ -41,15 +42,51 @@ class UnsplashPhoto:
     location: str
     description: str
     color: str
+    raw_url: str | None = None
+    query: str | None = None
+    _sized_urls: dict[tuple[int, int], str] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def getSizedUrl(self, width: int, quality: int) -> str:
+        """Get the url of the photo resized to a width.
+
+        Args:
+            width (int): width of the photo, in pixels
+            quality (int): compression quality of the photo
 
-    def toResponse(self) -> UnsplashResponse:
+        Returns:
+            str
+        """
+        if self.raw_url is None:
+            return self.url
+
+        key = (width, quality)
+        if key not in self._sized_urls:
+            separator = "&" if "?" in self.raw_url else "?"
+            self._sized_urls[key] = (
+                f"{self.raw_url}{separator}"
+                f"w={width}&q={quality}&fit=max&auto=format&cs=tinysrgb"
+            )
+
+        return self._sized_urls[key]
+
+    def toResponse(
+        self, width: int | None = None, quality: int = 75
+    ) -> UnsplashResponse:
         """Convert the UnsplashPhoto object to a UnsplashResponse object.
 
+        Args:
+            width (int, optional): width of the photo, in pixels.
+                Defaults to None, meaning the regular size.
+            quality (int, optional): compression quality of the photo.
+                Defaults to 75.
+
         Returns:
             UnsplashResponse
         """
         return UnsplashResponse(
-            url=self.url,
+            url=self.url if width is None else self.getSizedUrl(width, quality),
             link=self.link,
             blur_hash=self.blur_hash,
             location=self.location,
@@ -75,54 +112,40 @@ class UnsplashPhoto:
         return luminance < 0.5
 
 
-class UnsplashService:
+class UnsplashService(CachedService):
     """UnsplashService class, used to get a random photo from unsplash."""
 
-    _settings_path: str
+    _settings_class = UnsplashSettings
+
     _settings: UnsplashSettings
-    _cached_photo: UnsplashPhoto
-    cached_time: float
+    _history: PhotoHistory | None
+    _tenant: str | None
 
     def __init__(
-        self, settings_path: str = "settings/settings.toml"
+        self,
+        settings_path: str = "settings/settings.toml",
+        overrides: dict | None = None,
+        history: PhotoHistory | None = None,
+        tenant: str | None = None,
     ) -> UnsplashService:
         """Create a UnsplashService object.
 
         Args:
             settings_path (str, optional): Path to the settings file.
                 Defaults to "settings/settings.toml".
+            overrides (dict, optional): Settings overriding the ones in the
+                settings file. Defaults to None.
+            history (PhotoHistory, optional): Store of the served photos.
+                Defaults to None.
+            tenant (str, optional): Name of the tenant the photos are stored
+                for. Defaults to None.
 
         Returns:
             UnsplashService
         """
-        logging.info("Initializing UnsplashService")
-        self.settings_path = settings_path
-        # the time the photo was cached to 0
-        self.cached_time = 0
-        self._cached_photo = None
-
-        self._loadSettings()
-
-    def _loadSettings(self) -> None:
-        """Load the settings from the settings file."""
-        with open(self.settings_path, "r") as f:
-            settings_data = toml.load(f)[self.__class__.__name__]
-
-        self._settings = UnsplashSettings.fromDict(settings_data)
-
-    async def _asyncRequestJSON(self, url: str, headers: dict = None) -> dict[str, Any]:
-        """Request a response from a url."""
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(url, headers=headers)
-            if response.status != 200:
-                logging.error(
-                    f"Request to {url} returned status code {response.status}"
-                )
-                raise Exception(
-                    f"Request to {url} returned status code {response.status}"
-                )
-
-            return await response.json()
+        super().__init__(settings_path, overrides)
+        self._history = history
+        self._tenant = tenant
 
     async def _requestPhoto(self) -> UnsplashPhoto:
         """Get a random photo from unsplash."""
@@ -137,37 +160,67 @@ class UnsplashService:
         }
 
         logging.info(f"Sending request to unsplash: {query}")
-        json_data = await self._asyncRequestJSON(query, headers=headers)
+        json_data = await self._requestJSON(query, headers=headers)
 
         logging.info("Parsing response from unsplash")
         img_data = {
             "color": json_data["color"],
             "url": json_data["urls"]["regular"],
+            "raw_url": json_data["urls"]["raw"],
             "link": json_data["links"]["html"],
             "blur_hash": json_data["blur_hash"],
             "location": json_data["location"]["name"],
             "photographer": json_data["user"]["username"],
             "photographer_url": json_data["user"]["links"]["html"],
             "description": json_data["description"],
+            "query": selected_query,
         }
         logging.info("Parsed response from unsplash")
 
         return UnsplashPhoto(**img_data)
 
+    def getPhotoWidth(self, viewport_width: int, dpr: float = 1) -> int:
+        """Get the width of the photo to serve to a client.
+
+        The width is snapped to the smallest size bucket that covers the
+        screen, so that the resized photos are shared among the clients.
+
+        Args:
+            viewport_width (int): width of the viewport, in css pixels
+            dpr (float, optional): device pixel ratio. Defaults to 1.
+
+        Returns:
+            int
+        """
+        width = viewport_width * dpr
+        buckets = sorted(self._settings.size_buckets)
+        for bucket in buckets:
+            if bucket >= width:
+                return bucket
+
+        return buckets[-1]
+
+    @property
+    def quality(self) -> int:
+        """Get the compression quality of the resized photos."""
+        return self._settings.quality
+
+    async def _fetchPhoto(self) -> UnsplashPhoto:
+        """Request a new photo and store it in the history."""
+        photo = await self._requestPhoto()
+        if self._history is not None:
+            await self._history.add(photo, self._tenant)
+
+        return photo
+
+    async def refresh(self) -> None:
+        """Request a new photo, ahead of the expiration of the current one."""
+        await self._getCached(
+            "photo", self._settings.cache_duration, self._fetchPhoto, force=True
+        )
+
     async def getRandomPhoto(self) -> UnsplashPhoto:
         """Get a random photo from unsplash."""
-        elapsed_time = datetime.now().timestamp() - self.cached_time
-        if elapsed_time > self._settings.cache_duration:
-            # if the photo is older than the cache duration, request a new one
-            logging.info("Requesting new photo from unsplash")
-            # save started time for logging purposes
-            started_time = datetime.now()
-            # request the photo
-            self._cached_photo = await self._requestPhoto()
-            # compute elapsed time
-            elapsed = (datetime.now() - started_time).total_seconds()
-            logging.info(f"Photo requested in {elapsed} seconds")
-            # update the cached time
-            self.cached_time = datetime.now().timestamp()
-
-        return self._cached_photo
+        return await self._getCached(
+            "photo", self._settings.cache_duration, self._fetchPhoto
+        )
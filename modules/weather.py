@@ -2,17 +2,36 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
+from functools import partial
+from typing import Any
 
-import aiohttp
-import toml
 from pydantic import BaseModel
 
+from modules.cachedservice import CachedService
 from modules.settings import WeatherSettings
 
 
+class ForecastResponse(BaseModel):
+    """ForecastResponse class, used to represent a forecast response."""
+
+    time: str
+    temperature: str
+    description: str
+
+
+class AirQualityResponse(BaseModel):
+    """AirQualityResponse class, used to represent an air quality response."""
+
+    aqi: int
+    quality: str
+    pm2_5: float
+    pm10: float
+
+
 class WeatherResponse(BaseModel):
     """WeatherResponse class, used to represent a weather response."""
 
@@ -23,6 +42,49 @@ class WeatherResponse(BaseModel):
     max_temperature: str
     humidity: str
     description: str
+    forecast: list[ForecastResponse] | None = None
+    air_quality: AirQualityResponse | None = None
+
+
+@dataclass
+class Forecast:
+    """Forecast class, used to represent the forecast at a given time."""
+
+    time: float
+    temperature: float
+    description: str
+
+    def toResponse(self) -> ForecastResponse:
+        """Convert the Forecast object to a ForecastResponse object."""
+        return ForecastResponse(
+            time=datetime.fromtimestamp(self.time).strftime("%H:%M"),
+            temperature=f"{round(self.temperature, 1)}°C",
+            description=self.description,
+        )
+
+
+@dataclass
+class AirQuality:
+    """AirQuality class, used to represent the air quality."""
+
+    aqi: int
+    pm2_5: float
+    pm10: float
+
+    @property
+    def quality(self) -> str:
+        """Get the air quality index as a word."""
+        qualities = ("good", "fair", "moderate", "poor", "very poor")
+        return qualities[min(max(self.aqi, 1), 5) - 1]
+
+    def toResponse(self) -> AirQualityResponse:
+        """Convert the AirQuality object to a AirQualityResponse object."""
+        return AirQualityResponse(
+            aqi=self.aqi,
+            quality=self.quality,
+            pm2_5=self.pm2_5,
+            pm10=self.pm10,
+        )
 
 
 @dataclass
@@ -36,6 +98,10 @@ class Weather:
     max_temperature: float
     humidity: float
     description: str
+    latitude: float | None = None
+    longitude: float | None = None
+    forecast: list[Forecast] | None = None
+    air_quality: AirQuality | None = None
 
     def _formatTemperature(self, temperature: float) -> str:
         return f"{round(temperature, 1)}°C"
@@ -70,48 +136,95 @@ class Weather:
             max_temperature=self.max_temperature_formatted,
             humidity=self.humidity_formatted,
             description=self.description,
+            forecast=(
+                [f.toResponse() for f in self.forecast]
+                if self.forecast is not None
+                else None
+            ),
+            air_quality=(
+                self.air_quality.toResponse() if self.air_quality is not None else None
+            ),
         )
 
 
-class WeatherService:
-    """WeatherService class, used to represent the weather service."""
+class WeatherService(CachedService):
+    """WeatherService class, used to represent the weather service.
+
+    The weather is merged from multiple OpenWeatherMap endpoints, requested
+    concurrently. Each endpoint is cached for its own duration; an endpoint
+    that fails or misses its deadline is left out of (or kept stale in)
+    the merged weather.
+    """
+
+    _settings_class = WeatherSettings
+    _BASE_URL = "http://api.openweathermap.org/data/2.5/"
 
-    _settings_path: str
     _settings: WeatherSettings
-    _cached_weather: Weather
-    _cached_time: float
-
-    def __init__(self, settings_path: str = "settings/settings.toml") -> WeatherService:
-        """Instantiate a new Weather object."""
-        logging.info("Initializing WeatherService")
-        self._settings_path = settings_path
-        # set the time the weather was cached to 0
-        self._cached_time = 0
-        self._cached_weather = None
-
-        self._loadSettings()
-
-    def _loadSettings(self) -> None:
-        with open(self._settings_path, "r") as f:
-            settings = toml.load(f)[self.__class__.__name__]
-
-        self._settings = WeatherSettings.fromDict(settings)
-
-    async def _requestJSON(self, url: str) -> dict:
-        """Request a JSON object from a url."""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                return await response.json()
-
-    async def _requestWeather(self) -> Weather:
-        request_url = (
-            f"http://api.openweathermap.org/data/2.5/weather?"
+
+    def __init__(
+        self,
+        settings_path: str = "settings/settings.toml",
+        overrides: dict | None = None,
+    ) -> WeatherService:
+        """Instantiate a new Weather object.
+
+        Args:
+            settings_path (str, optional): Path to the settings file.
+                Defaults to "settings/settings.toml".
+            overrides (dict, optional): Settings overriding the ones in the
+                settings file. Defaults to None.
+        """
+        super().__init__(settings_path, overrides)
+
+    def _getCacheDuration(self, endpoint: str) -> float:
+        """Get the cache duration of an endpoint, in seconds.
+
+        Args:
+            endpoint (str): the endpoint
+
+        Returns:
+            float
+        """
+        return {
+            "weather": self._settings.cache_duration,
+            "forecast": self._settings.forecast_cache_duration,
+            "air_pollution": self._settings.air_quality_cache_duration,
+        }[endpoint]
+
+    def _getUrl(self, endpoint: str) -> str | None:
+        """Get the url of an endpoint.
+
+        Args:
+            endpoint (str): the endpoint
+
+        Returns:
+            str | None: the url, None if it cannot be built yet
+        """
+        if endpoint == "air_pollution":
+            # the air pollution is only available by coordinates,
+            # which are known once the current weather has been fetched
+            latitude, longitude = self._settings.latitude, self._settings.longitude
+            if latitude is None or longitude is None:
+                current = self._cache.get("weather", stale=True)
+                if current is None or current.latitude is None:
+                    return None
+                latitude, longitude = current.latitude, current.longitude
+
+            return (
+                f"{self._BASE_URL}air_pollution?"
+                f"lat={latitude}&lon={longitude}"
+                f"&appid={self._settings.api_key}"
+            )
+
+        return (
+            f"{self._BASE_URL}{endpoint}?"
             f"q={self._settings.city}"
             f"&appid={self._settings.api_key}"
             f"&units=metric&lang={self._settings.language}"
         )
 
-        json_data = await self._requestJSON(request_url)
+    def _parseWeather(self, json_data: dict) -> Weather:
+        coord = json_data.get("coord", {})
         return Weather(
             cod=json_data["cod"],
             city=json_data["name"],
@@ -120,17 +233,120 @@ class WeatherService:
             max_temperature=json_data["main"]["temp_max"],
             humidity=json_data["main"]["humidity"],
             description=json_data["weather"][0]["description"],
+            latitude=coord.get("lat"),
+            longitude=coord.get("lon"),
+        )
+
+    def _parseForecast(self, json_data: dict) -> list[Forecast]:
+        return [
+            Forecast(
+                time=item["dt"],
+                temperature=item["main"]["temp"],
+                description=item["weather"][0]["description"],
+            )
+            for item in json_data["list"][: self._settings.forecast_length]
+        ]
+
+    def _parseAirQuality(self, json_data: dict) -> AirQuality:
+        item = json_data["list"][0]
+        return AirQuality(
+            aqi=item["main"]["aqi"],
+            pm2_5=item["components"]["pm2_5"],
+            pm10=item["components"]["pm10"],
+        )
+
+    async def _requestEndpoint(self, endpoint: str, url: str) -> Any:
+        """Request and parse an endpoint, within the request deadline.
+
+        Args:
+            endpoint (str): the endpoint
+            url (str): the url of the endpoint
+
+        Returns:
+            Any: the parsed data
+        """
+        json_data = await asyncio.wait_for(
+            self._requestJSON(url),
+            self._settings.request_timeout,
+        )
+        parsers = {
+            "weather": self._parseWeather,
+            "forecast": self._parseForecast,
+            "air_pollution": self._parseAirQuality,
+        }
+        return parsers[endpoint](json_data)
+
+    async def _getEndpoint(self, endpoint: str, force: bool = False) -> Any:
+        """Get an endpoint from the cache, requesting it if it has expired.
+
+        An endpoint whose url depends on the current weather waits for it,
+        sharing the request of the current weather made concurrently.
+
+        Args:
+            endpoint (str): the endpoint
+            force (bool, optional): whether to request the endpoint even if
+                it has not expired. Defaults to False.
+
+        Returns:
+            Any: the parsed data
+        """
+        url = self._getUrl(endpoint)
+        if url is None:
+            await self._getEndpoint("weather", force)
+            url = self._getUrl(endpoint)
+            if url is None:
+                raise Exception(f"Cannot build the url of {endpoint}")
+
+        return await self._getCached(
+            endpoint,
+            self._getCacheDuration(endpoint),
+            partial(self._requestEndpoint, endpoint, url),
+            force,
+        )
+
+    async def _requestWeather(self, force: bool = False) -> None:
+        """Get the endpoints concurrently, requesting the expired ones.
+
+        Args:
+            force (bool, optional): whether to request the endpoints even if
+                they have not expired. Defaults to False.
+        """
+        endpoints = self._settings.endpoints
+        results = await asyncio.gather(
+            *(self._getEndpoint(e, force) for e in endpoints),
+            return_exceptions=True,
         )
 
+        for endpoint, result in zip(endpoints, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Cannot fetch weather endpoint {endpoint}: {result!r}")
+
+    def _mergeWeather(self) -> Weather | None:
+        """Merge the cached endpoints into a single Weather object.
+
+        Returns:
+            Weather | None: the weather, None if the current weather
+                has never been fetched
+        """
+        current = self._cache.get("weather", stale=True)
+        if current is None:
+            return None
+
+        return replace(
+            current,
+            forecast=self._cache.get("forecast", stale=True),
+            air_quality=self._cache.get("air_pollution", stale=True),
+        )
+
+    async def refresh(self) -> None:
+        """Request all the endpoints, ahead of their expiration."""
+        await self._requestWeather(force=True)
+
     async def getWeather(self) -> Weather:
         """Get the weather."""
-        elapsed_time = datetime.now().timestamp() - self._cached_time
-        if elapsed_time > self._settings.cache_duration:
-            # if the weather is older than the cache duration, fetch it again
-            logging.info("Fetching weather")
-            # store the weather in the cache
-            self._cached_weather = await self._requestWeather()
-            # update the cached time
-            self._cached_time = datetime.now().timestamp()
-
-        return self._cached_weather
+        await self._requestWeather()
+        weather = self._mergeWeather()
+        if weather is None:
+            raise Exception("Cannot fetch the current weather")
+
+        return weather
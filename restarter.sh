@@ -0,0 +1,5 @@
+#!/bin/bash
+# change to the script directory
+cd "$( dirname "${BASH_SOURCE[0]}" )"
+# launch the script in the virtual environment, taking over from the running one
+.venv/bin/python3 rpi-homepage.py --restart
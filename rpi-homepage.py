@@ -1,16 +1,39 @@
 """This module contains the logic to handle the homepage."""
 from __future__ import annotations
 
+import argparse
 import asyncio
 
 from modules.rpiserver import RPiServer
 
 
-async def main():
-    """Program entry point, starting the server."""
+async def main(restart: bool = False, export: bool = False):
+    """Program entry point, starting the server.
+
+    Args:
+        restart (bool, optional): Whether to take over from an already
+            running server. Defaults to False.
+        export (bool, optional): Whether to export the homepages as static
+            files instead of serving them. Defaults to False.
+    """
     r = RPiServer()
-    await r.startAsync()
+    if export:
+        await r.exportAsync()
+    else:
+        await r.startAsync(restart=restart)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="RPi Homepage")
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="take over from the running server without downtime",
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="periodically export the homepages as static files, without serving",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(restart=args.restart, export=args.export))
@@ -1,7 +1,9 @@
 // load background from backend and set it into body
 const setBackground = async () => {
   // get background from server
-  const image = await makeRequest("/get/image");
+  const width = Math.round(window.innerWidth);
+  const dpr = window.devicePixelRatio || 1;
+  const image = await makeRequest(`/get/image?w=${width}&dpr=${dpr}`);
 
   // place into page
   if (!image) return;
@@ -80,9 +82,57 @@ const setWeather = async () => {
       "#temperature-humidity"
     ).textContent = `${weather.temperature} - ${weather.humidity}`;
     document.querySelector("#description").textContent = weather.description;
+
+    // forecast and air quality might be missing if their request failed
+    const forecast = weather.forecast
+      ? weather.forecast
+          .slice(0, 4)
+          .map((f) => `${f.time} ${f.temperature}`)
+          .join(" · ")
+      : "";
+    document.querySelector("#forecast").textContent = forecast;
+
+    const air_quality = weather.air_quality
+      ? `air quality: ${weather.air_quality.quality}`
+      : "";
+    document.querySelector("#air-quality").textContent = air_quality;
   }
 };
 
+// loads news headlines from backend and sets them into the list
+const setNews = async () => {
+  const news = await makeRequest("/get/news?limit=5");
+  if (!news) return;
+
+  const list = document.querySelector("#news");
+  const items = news.slice(0, 5).map((item) => {
+    const li = document.createElement("li");
+    const a = document.createElement("a");
+    a.href = item.link;
+    a.textContent = item.source ? `${item.source}: ${item.title}` : item.title;
+    li.appendChild(a);
+    return li;
+  });
+  list.replaceChildren(...items);
+};
+
+// loads the latest system stats from backend and sets them into container
+const setSystem = async () => {
+  const system = await makeRequest("/get/system?limit=1");
+  if (!system || !system.samples.length) return;
+
+  const sample = system.samples[0];
+  const stats = [];
+  if (sample.cpu !== null) stats.push(`cpu ${Math.round(sample.cpu)}%`);
+  if (sample.temperature !== null)
+    stats.push(`${sample.temperature.toFixed(1)}°C`);
+  if (sample.memory_total)
+    stats.push(
+      `mem ${Math.round((100 * sample.memory_used) / sample.memory_total)}%`
+    );
+  document.querySelector("#system").textContent = stats.join(" · ");
+};
+
 // toggles blur on background
 const toggleBlur = (e) => {
   const background = document.querySelector(".background");
@@ -114,29 +164,46 @@ const toggleBlur = (e) => {
   }
 };
 
-// makes a request to an url
+// makes a request to an url, relative to the homepage path prefix
 const makeRequest = async (url, method = "GET") => {
   const options = {
     method,
   };
+  const prefix = document.querySelector(".page").dataset.prefix || "";
 
-  return fetch(url, options)
+  return fetch(`${prefix}${url}`, options)
     .then((response) => response.json())
     .catch(() => null);
 };
 
+// registers the service worker, caching the page for the next visits;
+// its scope is the root of the homepage, under its path prefix if any
+const registerServiceWorker = () => {
+  if (!("serviceWorker" in navigator)) return;
+  const prefix = document.querySelector(".page").dataset.prefix || "";
+  navigator.serviceWorker.register(`${prefix}/sw.js`).catch(() => null);
+};
+
 const main = () => {
   // set date, weather and background
   setDate();
   setWeather();
   setBackground();
+  setNews();
+  setSystem();
   // update date every second
   setInterval(setDate, 1000);
   // update weather every 5 minutes
   setInterval(setWeather, 300000);
+  // update news every 15 minutes
+  setInterval(setNews, 900000);
+  // update system stats every 10 seconds
+  setInterval(setSystem, 10000);
 
   // add event listener for view image
   document.querySelector(".view-image").addEventListener("click", toggleBlur);
+
+  registerServiceWorker();
 };
 
 // set --vh and --vw css variables
@@ -0,0 +1,103 @@
+// service worker, caching the page shell and the last data
+const SHELL_CACHE = "rpi-homepage-shell-v2";
+const DATA_CACHE = "rpi-homepage-data-v1";
+const IMAGE_CACHE = "rpi-homepage-image-v1";
+const CACHES = [SHELL_CACHE, DATA_CACHE, IMAGE_CACHE];
+
+// files needed to paint the page, relative to the scope of the worker:
+// the root of the homepage, which can be under a path prefix
+const SHELL_FILES = [
+  "./",
+  "./static/css/vars.css",
+  "./static/css/style.css",
+  "./static/css/bigscreens.css",
+  "./static/css/Roboto-Light.ttf",
+  "./static/js/main.js",
+  "./static/img/favicon.ico",
+];
+const SHELL_PATHS = SHELL_FILES.map(
+  (file) => new URL(file, self.registration.scope).pathname
+);
+
+// api endpoints served from cache while being refreshed
+const DATA_PATHS = ["/get/weather", "/get/image", "/get/news"];
+
+// serve from cache if available, while updating the cache from the network
+const staleWhileRevalidate = async (event, cache_name) => {
+  const cache = await caches.open(cache_name);
+  const cached = await cache.match(event.request);
+
+  const network = fetch(event.request)
+    .then((response) => {
+      if (response.ok) cache.put(event.request, response.clone());
+      return response;
+    })
+    .catch(() => cached);
+
+  if (cached) {
+    // keep the worker alive until the cache is updated
+    event.waitUntil(network);
+    return cached;
+  }
+
+  return network;
+};
+
+// serve the background image from cache, keeping only the last one
+const cacheLastImage = async (event) => {
+  const cache = await caches.open(IMAGE_CACHE);
+  const cached = await cache.match(event.request);
+  if (cached) return cached;
+
+  const response = await fetch(event.request);
+  // opaque responses (status 0) come from cross origin images
+  if (response.ok || response.type == "opaque") {
+    const keys = await cache.keys();
+    await Promise.all(keys.map((key) => cache.delete(key)));
+    await cache.put(event.request, response.clone());
+  }
+
+  return response;
+};
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches
+      .open(SHELL_CACHE)
+      .then((cache) => cache.addAll(SHELL_PATHS))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  // remove the caches of the previous versions
+  event.waitUntil(
+    caches
+      .keys()
+      .then((keys) =>
+        Promise.all(
+          keys
+            .filter((key) => !CACHES.includes(key))
+            .map((key) => caches.delete(key))
+        )
+      )
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method != "GET") return;
+
+  const url = new URL(request.url);
+  const same_origin = url.origin == self.location.origin;
+
+  // the api can be served under the path prefix of a homepage
+  if (same_origin && DATA_PATHS.some((path) => url.pathname.endsWith(path))) {
+    event.respondWith(staleWhileRevalidate(event, DATA_CACHE));
+  } else if (same_origin && SHELL_PATHS.includes(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(event, SHELL_CACHE));
+  } else if (!same_origin && request.destination == "image") {
+    event.respondWith(cacheLastImage(event));
+  }
+});